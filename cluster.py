@@ -0,0 +1,154 @@
+import bisect
+import hashlib
+import os
+import socket
+import sqlite3
+import time
+
+# ----- 워커 분산 설정 -----
+# 여러 호스트에서 실행할 때는 공유 디렉터리의 경로를 지정하고 SQLITE_JOURNAL_MODE=DELETE 로 실행합니다.
+# (WAL 은 공유 메모리를 쓰므로 NFS 같은 네트워크 파일시스템에서는 동작하지 않음)
+CLUSTER_DB_PATH = os.environ.get("CLUSTER_DB_PATH", "cluster.db")
+SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL").upper()
+if SQLITE_JOURNAL_MODE not in ("WAL", "DELETE", "TRUNCATE", "PERSIST"):
+    raise ValueError(f"지원하지 않는 SQLITE_JOURNAL_MODE: {SQLITE_JOURNAL_MODE}")
+HEARTBEAT_INTERVAL_SECONDS = 10
+WORKER_TTL_SECONDS = 30      # 이 시간 동안 heartbeat 가 없으면 죽은 워커로 보고 샤드를 재분배
+VIRTUAL_NODES = 100          # 워커당 해시 링 가상 노드 수 (분배 편차 완화)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    heartbeat_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS leases_expires ON leases (expires_at);
+"""
+
+
+def _connect(db_path: str = CLUSTER_DB_PATH):
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+# ----- 워커 등록 -----
+def heartbeat(worker_id: str, db_path: str = CLUSTER_DB_PATH):
+    conn = _connect(db_path)
+    try:
+        conn.execute(
+            "INSERT INTO workers (worker_id, heartbeat_at) VALUES (?, ?) "
+            "ON CONFLICT(worker_id) DO UPDATE SET heartbeat_at = excluded.heartbeat_at",
+            (worker_id, time.time()),
+        )
+    finally:
+        conn.close()
+
+
+def remove_worker(worker_id: str, db_path: str = CLUSTER_DB_PATH):
+    """
+    정상 종료 시 호출하면 TTL 을 기다리지 않고 바로 샤드가 재분배됩니다.
+    """
+    conn = _connect(db_path)
+    try:
+        conn.execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+        conn.execute("DELETE FROM leases WHERE owner = ?", (worker_id,))
+    finally:
+        conn.close()
+
+
+def live_workers(db_path: str = CLUSTER_DB_PATH) -> list:
+    conn = _connect(db_path)
+    try:
+        cutoff = time.time() - WORKER_TTL_SECONDS
+        conn.execute("DELETE FROM workers WHERE heartbeat_at < ?", (cutoff,))
+        rows = conn.execute("SELECT worker_id FROM workers ORDER BY worker_id").fetchall()
+        return [row[0] for row in rows]
+    finally:
+        conn.close()
+
+
+# ----- 일관된 해싱 -----
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    워커가 추가/제거될 때 해당 워커의 설정만 옮겨가도록 하는 일관된 해시 링입니다.
+    """
+    def __init__(self, workers, virtual_nodes: int = VIRTUAL_NODES):
+        points = sorted((_hash(f"{worker}#{i}"), worker) for worker in workers for i in range(virtual_nodes))
+        self.keys = [point for point, _ in points]
+        self.owners = [worker for _, worker in points]
+
+    def owner(self, key: str):
+        if not self.keys:
+            return None
+        index = bisect.bisect(self.keys, _hash(key)) % len(self.keys)
+        return self.owners[index]
+
+
+def owned_settings(settings, worker_id: str, db_path: str = CLUSTER_DB_PATH):
+    """
+    현재 살아 있는 워커 기준으로 이 워커가 담당하는 설정만 반환합니다.
+    """
+    heartbeat(worker_id, db_path)
+    ring = HashRing(live_workers(db_path))
+    return [s for s in settings if ring.owner(s.get("setting_name", "")) == worker_id]
+
+
+# ----- 임대(lease) 잠금 -----
+def acquire_lease(name: str, owner: str, ttl_seconds: float, db_path: str = CLUSTER_DB_PATH) -> bool:
+    """
+    이름 단위 잠금을 ttl_seconds 동안 얻습니다. 만료된 잠금은 다른 워커가 가져갈 수 있습니다.
+    """
+    now = time.time()
+    conn = _connect(db_path)
+    try:
+        # 설정/날짜별 잠금은 풀지 않고 만료시키므로, 만료된 잠금은 여기서 지워 테이블이 계속 커지지 않게 함
+        conn.execute("DELETE FROM leases WHERE expires_at < ?", (now,))
+        conn.execute(
+            "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+            "WHERE leases.expires_at < ? OR leases.owner = excluded.owner",
+            (name, owner, now + ttl_seconds, now),
+        )
+        row = conn.execute("SELECT owner FROM leases WHERE name = ?", (name,)).fetchone()
+        return row is not None and row[0] == owner
+    finally:
+        conn.close()
+
+
+def release_lease(name: str, owner: str, db_path: str = CLUSTER_DB_PATH):
+    conn = _connect(db_path)
+    try:
+        conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+    finally:
+        conn.close()
+
+
+def wait_for_lease(name: str, timeout: float, db_path: str = CLUSTER_DB_PATH) -> bool:
+    """
+    다른 워커가 가진 잠금이 풀릴 때까지 최대 timeout 초 기다립니다. 풀렸으면 True.
+    """
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        conn = _connect(db_path)
+        try:
+            row = conn.execute("SELECT 1 FROM leases WHERE name = ? AND expires_at >= ?", (name, time.time())).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return True
+        time.sleep(0.5)
+    return False
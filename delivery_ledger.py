@@ -0,0 +1,236 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# 설정별 발송 기록 폴더 (설정마다 파일을 나눠 동시에 써도 서로 덮어쓰지 않음)
+LEDGER_FOLDER = os.environ.get("DELIVERY_LEDGER_FOLDER", "delivery_ledger")
+
+UPSERT_MESSAGES = {
+    "created": "위키 페이지가 성공적으로 생성되었습니다.",
+    "updated": "위키 페이지 내용이 갱신되었습니다.",
+    "skipped": "위키 페이지 내용이 같아 업로드를 생략했습니다.",
+    "commented": "위키 페이지에 새 보도자료를 댓글로 추가했습니다.",
+    "appended": "위키 페이지에 새 보도자료를 덧붙였습니다.",
+}
+
+# 하루 중 새 항목만 보내는 방식 (댓글 / 본문 끝에 덧붙이기)
+INTRADAY_MODES = ("comment", "append")
+DEFAULT_INTRADAY_INTERVAL_MINUTES = 30
+
+_lock = threading.Lock()
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _ledger_path(setting_name: str, folder: str) -> str:
+    return os.path.join(folder, f"{setting_name}_ledger.json")
+
+
+def load_ledger(setting_name: str, folder: str = LEDGER_FOLDER) -> dict:
+    """
+    설정의 발송 기록을 반환합니다. 형식: {날짜: {"page_id": ..., "content_hash": ...}}
+    """
+    try:
+        with open(_ledger_path(setting_name, folder), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def get_delivery(setting_name: str, cur_date: str, folder: str = LEDGER_FOLDER):
+    return load_ledger(setting_name, folder).get(cur_date)
+
+
+def record_delivery(setting_name: str, cur_date: str, record: dict, folder: str = LEDGER_FOLDER):
+    """
+    (설정, 날짜)의 발송 기록을 저장합니다.
+    """
+    with _lock:
+        os.makedirs(folder, exist_ok=True)
+        ledger = load_ledger(setting_name, folder)
+        ledger[cur_date] = record
+        file_path = _ledger_path(setting_name, folder)
+        tmp_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(ledger, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, file_path)
+
+
+def delivered_links(setting_name: str, cur_date: str, folder: str = LEDGER_FOLDER) -> set:
+    """
+    그날 페이지로 이미 보낸 항목 link 와, 바로 전 발송일에 보낸 link 를 합쳐 반환합니다.
+    (자정을 넘겨 새 페이지가 생겨도 전날 저녁에 보낸 항목을 다시 보내지 않도록)
+    """
+    ledger = load_ledger(setting_name, folder)
+    links = set(ledger.get(cur_date, {}).get("delivered_links", []))
+    earlier = [day for day in ledger if day < cur_date and day[:1].isdigit()]
+    if earlier:
+        links.update(ledger[max(earlier)].get("delivered_links", []))
+    return links
+
+
+def _merge_links(old_links, new_links) -> list:
+    return list(dict.fromkeys(list(old_links or []) + list(new_links or [])))
+
+
+# 본문의 위키 첨부파일 링크: [이름](/files/<파일 ID>)
+_FILE_LINK = re.compile(r"\[([^\]]*)\]\(/files/([^)\s]+)\)")
+
+
+def linked_file_ids(content: str) -> list:
+    return list(dict.fromkeys(match.group(2) for match in _FILE_LINK.finditer(content)))
+
+
+def drop_unattached_links(content: str, attached_file_ids) -> str:
+    """
+    페이지에 첨부되지 않은 파일 링크는 이름만 남깁니다.
+    (첨부는 페이지를 만들 때만 할 수 있어, 갱신/댓글/덧붙이기로 보낸 새 파일 링크는 열리지 않음)
+    """
+    attached = set(attached_file_ids or [])
+    return _FILE_LINK.sub(lambda match: match.group(0) if match.group(2) in attached else match.group(1), content)
+
+
+def _upsert_page(client, record, wiki_id: str, parent_page_id: str, subject: str, content: str):
+    """
+    페이지 하나를 기록(record)과 비교해 생성/갱신/생략합니다.
+    본문에 링크된 첨부파일은 페이지를 새로 만들 때 그 페이지에 첨부하고,
+    이미 있는 페이지를 갱신할 때는 첨부되지 않은 파일의 링크를 뺍니다.
+    반환값: (동작, 새 기록)
+    """
+    if record and record.get("page_id"):
+        update_content = drop_unattached_links(content, record.get("attached_file_ids"))
+        new_hash = content_hash(update_content)
+        if record.get("content_hash") == new_hash:
+            return "skipped", record
+        try:
+            client.update_wiki_page_content(wiki_id, record["page_id"], update_content)
+            return "updated", {**record, "content_hash": new_hash}
+        except requests.HTTPError as e:
+            # 페이지가 삭제된 경우에만 새로 생성, 그 외 오류는 그대로 전달
+            if e.response is None or e.response.status_code != 404:
+                raise
+            print(f"기록된 페이지({record['page_id']})가 없어 새로 생성합니다.")
+
+    file_ids = linked_file_ids(content)
+    response = client.create_wiki_page(wiki_id, parent_page_id, subject, content, attachFileIds=file_ids or None)
+    if not response.get("header", {}).get("isSuccessful", True):
+        raise Exception(f"위키 페이지 생성 실패: {response.get('header')}")
+    return "created", {"subject": subject, "page_id": response["result"]["id"], "content_hash": content_hash(content),
+                       "attached_file_ids": file_ids}
+
+
+def upsert_wiki_page(client, setting_name: str, cur_date: str, wiki_id: str, parent_page_id: str,
+                     subject: str, content: str, children=None, max_workers: int = 4, folder: str = LEDGER_FOLDER,
+                     links=None):
+    """
+    (설정, 날짜)마다 위키 페이지를 하나만 유지합니다.
+    - 기록이 없으면 페이지 생성
+    - 내용 해시가 바뀌었으면 update_wiki_page_content 로 갱신
+    - 같으면 아무 요청도 보내지 않음
+    children([(제목, 내용), ...])이 있으면 같은 방식으로 하위 페이지를 동시에 upsert 합니다.
+    본문에 링크된 첨부파일은 그 링크가 있는 페이지(부모/하위)를 만들 때 첨부합니다.
+    links 를 넘기면 페이지에 담긴 항목 link 를 기록해 이후 증분 발송에서 제외합니다.
+    반환값: (동작("created" / "updated" / "skipped"), page_id)
+    """
+    record = get_delivery(setting_name, cur_date, folder) or {}
+    action, parent_record = _upsert_page(client, record, wiki_id, parent_page_id, subject, content)
+    page_id = parent_record["page_id"]
+
+    # 부모가 새로 만들어졌으면 예전 하위 페이지 기록은 쓸 수 없음
+    old_children = [] if action == "created" else record.get("children", [])
+    children = list(children or [])
+    new_children = list(old_children)
+    actions = [action]
+
+    def upsert_child(i):
+        child_subject, child_content = children[i]
+        old = old_children[i] if i < len(old_children) else None
+        return _upsert_page(client, old, wiki_id, page_id, child_subject, child_content)
+
+    errors = []
+    try:
+        if children:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(upsert_child, i) for i in range(len(children))]
+            for i, future in enumerate(futures):
+                try:
+                    child_action, child_record = future.result()
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                actions.append(child_action)
+                while len(new_children) <= i:
+                    new_children.append({})
+                new_children[i] = child_record
+
+        # 분할 수가 줄었으면 남는 하위 페이지는 비워둠
+        for i in range(len(children), len(old_children)):
+            child_action, child_record = _upsert_page(
+                client, old_children[i], wiki_id, page_id,
+                old_children[i].get("subject", ""), "이 페이지의 내용은 다른 페이지로 옮겨졌습니다."
+            )
+            actions.append(child_action)
+            new_children[i] = child_record
+    finally:
+        # 일부 하위 페이지가 실패해도 성공한 페이지는 기록해 재시도 시 중복 생성을 막음
+        new_record = {**parent_record, "children": new_children}
+        # 항목 link 는 하위 페이지까지 모두 보낸 뒤에만 기록 (실패하면 다음 발송에서 전체를 다시 upsert)
+        if links is not None and not errors:
+            new_record["delivered_links"] = _merge_links(record.get("delivered_links"), links)
+        record_delivery(setting_name, cur_date, new_record, folder)
+
+    if errors:
+        raise errors[0]
+
+    if "created" in actions:
+        return ("created" if action == "created" else "updated"), page_id
+    if "updated" in actions:
+        return "updated", page_id
+    return "skipped", page_id
+
+
+def deliver_increment(client, setting_name: str, cur_date: str, wiki_id: str, mode: str, content: str, links,
+                      folder: str = LEDGER_FOLDER):
+    """
+    그날 페이지에 새 항목(content)만 보냅니다.
+    - comment: create_wiki_comment 로 댓글 추가
+    - append: 페이지 본문 끝에 덧붙여 update_wiki_page_content
+    이미 보낸 항목뿐이면(재시도 등) 아무 요청도 보내지 않습니다.
+    반환값: (동작("commented" / "appended" / "skipped"), page_id)
+    """
+    record = get_delivery(setting_name, cur_date, folder) or {}
+    page_id = record.get("page_id")
+    if not page_id:
+        raise Exception("새 보도자료를 붙일 오늘 페이지가 없습니다.")
+    if set(links) <= set(record.get("delivered_links", [])):
+        return "skipped", page_id
+    # 댓글/덧붙이기로는 파일을 첨부할 수 없으므로 페이지에 이미 첨부된 파일의 링크만 남김
+    content = drop_unattached_links(content, record.get("attached_file_ids"))
+
+    if mode == "comment":
+        response = client.create_wiki_comment(wiki_id, page_id, content)
+        if not response.get("header", {}).get("isSuccessful", True):
+            raise Exception(f"위키 댓글 작성 실패: {response.get('header')}")
+        action = "commented"
+    elif mode == "append":
+        current = client.get_wiki_page(wiki_id, page_id)["result"]["body"]["content"]
+        new_content = f"{current.rstrip()}\n\n{content}"
+        client.update_wiki_page_content(wiki_id, page_id, new_content)
+        record["content_hash"] = content_hash(new_content)
+        action = "appended"
+    else:
+        raise ValueError(f"알 수 없는 증분 발송 방식: {mode}")
+
+    record["delivered_links"] = _merge_links(record.get("delivered_links"), links)
+    record["last_increment_at"] = time.time()
+    record_delivery(setting_name, cur_date, record, folder)
+    return action, page_id
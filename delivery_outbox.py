@@ -0,0 +1,237 @@
+import json
+import os
+import random
+import sqlite3
+import time
+
+from cluster import SQLITE_JOURNAL_MODE
+
+# ----- 발송 대기열(outbox) 설정 -----
+OUTBOX_DB_PATH = os.environ.get("OUTBOX_DB_PATH", "delivery_outbox.db")
+MAX_ATTEMPTS = 8            # 이 횟수만큼 실패하면 dead 상태로 보관
+BACKOFF_BASE_SECONDS = 30   # 재시도 간격: 30초, 1분, 2분, ... (최대 BACKOFF_MAX_SECONDS)
+BACKOFF_MAX_SECONDS = 3600
+CLAIM_LEASE_SECONDS = 600   # 발송 중(sending) 상태가 이보다 오래되면 프로세스가 죽은 것으로 보고 다시 가져감
+SENT_RETENTION_DAYS = 7     # 발송 완료(sent) 항목은 이 기간이 지나면 내용(payload)과 함께 삭제
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    dedupe_key TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    version INTEGER NOT NULL DEFAULT 1,
+    next_attempt_at REAL NOT NULL,
+    claimed_at REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at);
+"""
+
+
+def _connect(db_path: str = OUTBOX_DB_PATH):
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def enqueue_delivery(dedupe_key: str, payload: dict, db_path: str = OUTBOX_DB_PATH) -> int:
+    """
+    렌더링된 다이제스트를 대기열에 넣고 id 를 반환합니다.
+    같은 dedupe_key(설정|날짜)가 이미 있으면 내용을 최신으로 바꾸고 다시 대기 상태로 만듭니다.
+    """
+    now = time.time()
+    conn = _connect(db_path)
+    try:
+        conn.execute(
+            """
+            INSERT INTO outbox (dedupe_key, payload, status, next_attempt_at, created_at, updated_at)
+            VALUES (?, ?, 'pending', ?, ?, ?)
+            ON CONFLICT(dedupe_key) DO UPDATE SET
+                payload = excluded.payload,
+                status = CASE WHEN outbox.status = 'sending' THEN 'sending' ELSE 'pending' END,
+                attempts = 0,
+                version = outbox.version + 1,
+                next_attempt_at = excluded.next_attempt_at,
+                last_error = NULL,
+                updated_at = excluded.updated_at
+            """,
+            (dedupe_key, json.dumps(payload, ensure_ascii=False), now, now, now),
+        )
+        return conn.execute("SELECT id FROM outbox WHERE dedupe_key = ?", (dedupe_key,)).fetchone()["id"]
+    finally:
+        conn.close()
+
+
+def _claim(conn, outbox_id=None):
+    """
+    발송할 항목 하나를 sending 상태로 가져옵니다. (여러 프로세스가 동시에 가져가지 않도록 잠금)
+    """
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        query = """
+            SELECT * FROM outbox
+            WHERE ((status = 'pending' AND next_attempt_at <= ?)
+                   OR (status = 'sending' AND claimed_at < ?))
+        """
+        params = [now, now - CLAIM_LEASE_SECONDS]
+        if outbox_id is not None:
+            query += " AND id = ?"
+            params.append(outbox_id)
+        row = conn.execute(query + " ORDER BY next_attempt_at LIMIT 1", params).fetchone()
+        if row is not None:
+            conn.execute(
+                "UPDATE outbox SET status = 'sending', claimed_at = ?, updated_at = ? WHERE id = ?",
+                (now, now, row["id"]),
+            )
+        conn.execute("COMMIT")
+        return row
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _backoff_seconds(attempts: int) -> float:
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** (attempts - 1)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _process(conn, row, deliver):
+    """
+    deliver(payload) 를 호출하고 결과에 따라 sent / pending(재시도) / dead 로 기록합니다.
+    반환값: (성공 여부, 메시지)
+    """
+    payload = json.loads(row["payload"])
+    try:
+        message = deliver(payload)
+    except Exception as e:
+        now = time.time()
+        attempts = row["attempts"] + 1
+        status = "dead" if attempts >= MAX_ATTEMPTS else "pending"
+        # 발송 중 내용이 바뀌었으면(version 증가) 시도 횟수를 새로 시작
+        conn.execute(
+            """
+            UPDATE outbox SET
+                status = CASE WHEN version = ? THEN ? ELSE 'pending' END,
+                attempts = CASE WHEN version = ? THEN ? ELSE 0 END,
+                next_attempt_at = ?,
+                last_error = ?,
+                updated_at = ?
+            WHERE id = ?
+            """,
+            (row["version"], status, row["version"], attempts, now + _backoff_seconds(attempts), str(e), now, row["id"]),
+        )
+        if status == "dead":
+            print(f"☠️ 발송 포기 ({row['dedupe_key']}, {attempts}회 실패): {e}")
+        return False, str(e)
+
+    now = time.time()
+    # 발송하는 동안 새 내용이 들어왔으면 sent 로 바꾸지 않고 다시 대기시킴
+    conn.execute(
+        """
+        UPDATE outbox SET
+            status = CASE WHEN version = ? THEN 'sent' ELSE 'pending' END,
+            next_attempt_at = ?,
+            last_error = NULL,
+            updated_at = ?
+        WHERE id = ?
+        """,
+        (row["version"], now, now, row["id"]),
+    )
+    return True, message
+
+
+def deliver_outbox_item(outbox_id: int, deliver, db_path: str = OUTBOX_DB_PATH):
+    """
+    특정 항목을 즉시 발송합니다. 실패하면 대기열에 남아 백그라운드 재시도 대상이 됩니다.
+    """
+    conn = _connect(db_path)
+    try:
+        row = _claim(conn, outbox_id)
+        if row is None:
+            return False, "다른 작업에서 발송 중이거나 재시도 대기 중입니다."
+        return _process(conn, row, deliver)
+    finally:
+        conn.close()
+
+
+def drain_outbox(deliver, max_items: int = 100, db_path: str = OUTBOX_DB_PATH):
+    """
+    발송 시각이 된 항목들을 차례로 발송합니다. 재시작 후에도 남은 항목부터 이어서 처리합니다.
+    반환값: (성공 수, 실패 수)
+    """
+    sent, failed = 0, 0
+    conn = _connect(db_path)
+    try:
+        for _ in range(max_items):
+            row = _claim(conn)
+            if row is None:
+                break
+            success, message = _process(conn, row, deliver)
+            if success:
+                sent += 1
+                print(f"✅ 대기열 발송 성공 ({row['dedupe_key']}): {message}")
+            else:
+                failed += 1
+                print(f"❌ 대기열 발송 실패 ({row['dedupe_key']}): {message}")
+        _purge_sent(conn)
+    finally:
+        conn.close()
+    return sent, failed
+
+
+def _purge_sent(conn):
+    """
+    SENT_RETENTION_DAYS 보다 오래된 sent 항목을 지웁니다. (렌더링된 다이제스트가 대기열에 계속 쌓이지 않도록)
+    pending / sending / dead 항목은 남겨 둡니다.
+    """
+    cutoff = time.time() - SENT_RETENTION_DAYS * 86400
+    cursor = conn.execute("DELETE FROM outbox WHERE status = 'sent' AND updated_at < ?", (cutoff,))
+    if cursor.rowcount:
+        print(f"🧹 대기열 정리: 오래된 발송 완료 항목 {cursor.rowcount}건 삭제")
+
+
+def outbox_status(dedupe_key: str, db_path: str = OUTBOX_DB_PATH):
+    """
+    dedupe_key 항목의 현재 상태를 반환합니다. 없으면 None.
+    """
+    conn = _connect(db_path)
+    try:
+        row = conn.execute("SELECT status FROM outbox WHERE dedupe_key = ?", (dedupe_key,)).fetchone()
+        return row["status"] if row else None
+    finally:
+        conn.close()
+
+
+def outbox_summary(db_path: str = OUTBOX_DB_PATH) -> dict:
+    """
+    상태별 항목 수를 반환합니다. 예: {"pending": 1, "sent": 10, "dead": 0}
+    """
+    conn = _connect(db_path)
+    try:
+        rows = conn.execute("SELECT status, COUNT(*) AS count FROM outbox GROUP BY status").fetchall()
+        return {row["status"]: row["count"] for row in rows}
+    finally:
+        conn.close()
+
+
+def retry_dead_deliveries(db_path: str = OUTBOX_DB_PATH) -> int:
+    """
+    dead 상태 항목을 다시 대기 상태로 돌립니다. 반환값: 변경된 항목 수
+    """
+    now = time.time()
+    conn = _connect(db_path)
+    try:
+        cursor = conn.execute(
+            "UPDATE outbox SET status = 'pending', attempts = 0, next_attempt_at = ?, updated_at = ? WHERE status = 'dead'",
+            (now, now),
+        )
+        return cursor.rowcount
+    finally:
+        conn.close()
@@ -0,0 +1,191 @@
+import fcntl
+import heapq
+import io
+import json
+import mmap
+import os
+import threading
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+import zstandard
+
+# ----- 다이제스트 아카이브 -----
+# 발송한 다이제스트(렌더링 결과)와 항목을 날짜별 zstd 압축 JSONL 파일로 보관합니다.
+#   digest_archive/YYYY/MM/YYYY-MM-DD.jsonl.zst
+# 저장할 때마다 새 zstd 프레임을 파일 끝에 덧붙이고, 읽을 때는 기간에 해당하는 파일만 한 줄씩 풀어 읽습니다.
+# 워커 여러 대가 같은 폴더를 공유하므로(설정이 재분배되어도 요약에 빠지는 날이 없도록) 덧붙이기/읽기는
+# 파일 잠금(flock)으로 보호합니다. _lock 은 같은 프로세스 안의 스레드끼리만 막습니다.
+DIGEST_ARCHIVE_DIR = os.environ.get("DIGEST_ARCHIVE_DIR", "digest_archive")
+ZSTD_LEVEL = 10
+ROLLUP_TOP_ITEMS = 10
+
+_lock = threading.Lock()
+
+
+def _partition_path(day: str, folder: str = DIGEST_ARCHIVE_DIR) -> str:
+    return os.path.join(folder, day[:4], day[5:7], f"{day}.jsonl.zst")
+
+
+def archive_digest(setting_name: str, cur_date: str, df, markdown: str, increment: bool = False,
+                   folder: str = DIGEST_ARCHIVE_DIR):
+    """
+    하루치 다이제스트(마크다운)와 포함된 항목들을 그날 파일에 덧붙입니다.
+    같은 날 다시 발송하면 기록이 한 번 더 쌓이고, 읽을 때 마지막 기록을 사용합니다.
+    increment 이면 하루 중 새 항목만 보낸 증분으로 표시합니다. (읽을 때 마지막 전체 다이제스트 뒤에 이어 붙임)
+    """
+    archived_at = datetime.now().isoformat(timespec="seconds")
+    records = [{"type": "digest", "setting_name": setting_name, "date": cur_date,
+                "archived_at": archived_at, "markdown": markdown, "increment": increment}]
+    for _, row in df.iterrows():
+        departments = row.get("departments")
+        records.append({
+            "type": "entry",
+            "setting_name": setting_name,
+            "date": cur_date,
+            "department": row["department"],
+            "departments": departments if isinstance(departments, list) else [row["department"]],
+            "title": row["title"],
+            "link": row["link"],
+            "published": row["published"].isoformat(),
+            "summary": row["summary"] if isinstance(row.get("summary"), str) else "",
+        })
+    lines = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+    frame = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(lines.encode("utf-8"))
+
+    path = _partition_path(cur_date, folder)
+    with _lock:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 다른 워커가 같은 파일에 덧붙이는 중이면 끝날 때까지 기다렸다가 프레임 하나를 한 번에 씀
+        with open(path, "ab") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.write(frame)
+                f.flush()
+                os.fsync(f.fileno())
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+    return path
+
+
+def _days(start: date, end: date):
+    day = start
+    while day <= end:
+        yield day.isoformat()
+        day += timedelta(days=1)
+
+
+def iter_archive(start: date, end: date, setting_name: str = None, record_type: str = None,
+                 folder: str = DIGEST_ARCHIVE_DIR):
+    """
+    start~end(포함) 기간의 기록을 한 줄씩 돌려줍니다. 전체를 메모리에 올리지 않고 파일을 mmap 해 스트리밍으로 풉니다.
+    """
+    decompressor = zstandard.ZstdDecompressor()
+    for day in _days(start, end):
+        path = _partition_path(day, folder)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            continue
+        with open(path, "rb") as f:
+            # 덧붙이는 중인 프레임을 반쯤 읽지 않도록, 쓰기가 끝난 뒤의 크기만큼만 매핑
+            fcntl.flock(f, fcntl.LOCK_SH)
+            try:
+                size = os.fstat(f.fileno()).st_size
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            if size == 0:
+                continue
+            mapped = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        with mapped:
+            with decompressor.stream_reader(mapped, read_across_frames=True) as reader:
+                for line in io.TextIOWrapper(reader, encoding="utf-8"):
+                    record = json.loads(line)
+                    if setting_name and record["setting_name"] != setting_name:
+                        continue
+                    if record_type and record["type"] != record_type:
+                        continue
+                    yield record
+
+
+def load_archived_digest(setting_name: str, day: str, folder: str = DIGEST_ARCHIVE_DIR):
+    """
+    그날 마지막으로 보관한 전체 다이제스트에, 그 뒤에 보낸 증분을 이어 붙여 반환합니다. 없으면 None.
+    """
+    day_date = date.fromisoformat(day)
+    parts = []
+    for record in iter_archive(day_date, day_date, setting_name, "digest", folder):
+        if record.get("increment"):
+            if parts:
+                parts.append(record["markdown"])
+        else:
+            parts = [record["markdown"]]
+    return "\n\n".join(parts) if parts else None
+
+
+# ----- 주간/월간 요약 -----
+def rollup_period(kind: str, today: date):
+    """
+    today 직전의 완료된 기간을 반환합니다. weekly: 지난주 월~일, monthly: 지난달 1일~말일
+    반환값: (시작일, 종료일, 제목)
+    """
+    if kind == "weekly":
+        start = today - timedelta(days=today.weekday() + 7)
+        end = start + timedelta(days=6)
+        return start, end, f"주간 보도자료 요약 ({start.isoformat()} ~ {end.isoformat()})"
+    if kind == "monthly":
+        end = today.replace(day=1) - timedelta(days=1)
+        start = end.replace(day=1)
+        return start, end, f"월간 보도자료 요약 ({start.strftime('%Y-%m')})"
+    raise ValueError(f"알 수 없는 요약 종류: {kind}")
+
+
+def build_rollup(start: date, end: date, setting_name: str = None, top_n: int = ROLLUP_TOP_ITEMS,
+                 folder: str = DIGEST_ARCHIVE_DIR) -> dict:
+    """
+    아카이브만 읽어 기간의 부서별 건수와 주요 보도자료를 집계합니다.
+    주요 보도자료는 여러 부서가 함께 낸 항목을 우선하고, 같으면 최신 항목입니다.
+    (한 번에 한 줄씩 읽고 상위 top_n 개만 유지하므로 기간이 길어도 메모리를 적게 씀)
+    """
+    seen = set()
+    by_department = Counter()
+    days = set()
+    top_items = []
+    for record in iter_archive(start, end, setting_name, "entry", folder):
+        days.add(record["date"])
+        if record["link"] in seen:
+            continue
+        seen.add(record["link"])
+        for department in record["departments"]:
+            by_department[department] += 1
+        item = (len(record["departments"]), record["published"], record["link"], record)
+        if len(top_items) < top_n:
+            heapq.heappush(top_items, item)
+        else:
+            heapq.heappushpop(top_items, item)
+    return {
+        "start": start,
+        "end": end,
+        "total": len(seen),
+        "days": len(days),
+        "departments": by_department.most_common(),
+        "top_items": [item[-1] for item in sorted(top_items, reverse=True)],
+    }
+
+
+def render_rollup(rollup: dict, title: str) -> str:
+    """
+    집계 결과를 위키에 올릴 마크다운으로 만듭니다.
+    """
+    markdown_output = f"# {title}\n\n"
+    markdown_output += f"발송 {rollup['days']}일, 보도자료 {rollup['total']}건\n\n"
+    if rollup["departments"]:
+        markdown_output += "## 부서별 건수\n\n| 부서 | 건수 |\n| --- | ---: |\n"
+        for department, count in rollup["departments"]:
+            markdown_output += f"| {department} | {count} |\n"
+        markdown_output += "\n"
+    if rollup["top_items"]:
+        markdown_output += "## 주요 보도자료\n"
+        for record in rollup["top_items"]:
+            pub_time = datetime.fromisoformat(record["published"]).strftime('%Y-%m-%d')
+            markdown_output += f"- **{record['title']}** [[링크]]({record['link']})  \n"
+            markdown_output += f"  <sub>({', '.join(record['departments'])}, {pub_time})</sub>\n\n"
+    return markdown_output
@@ -0,0 +1,71 @@
+# 한 페이지에 담을 최대 크기 (설정 파일의 max_page_bytes / max_page_items 로 변경 가능)
+DEFAULT_MAX_PAGE_BYTES = 100_000
+DEFAULT_MAX_PAGE_ITEMS = 60
+
+
+def _size(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def paginate_digest(df, render, max_bytes: int = DEFAULT_MAX_PAGE_BYTES, max_items: int = DEFAULT_MAX_PAGE_ITEMS):
+    """
+    렌더링 결과가 max_bytes / max_items 를 넘지 않도록 DataFrame 을 나눕니다.
+    부서 단위로 묶고, 한 부서가 혼자 한도를 넘으면 항목 단위로 나눕니다.
+    render(df) 는 마크다운 문자열을 반환하는 함수입니다.
+    반환값: [(부분 DataFrame, 렌더링된 마크다운), ...]
+    """
+    full = render(df)
+    if _size(full) <= max_bytes and len(df) <= max_items:
+        return [(df, full)]
+
+    header_size = _size(render(df.iloc[:0]))
+
+    # 분할 단위(부서 전체 또는 개별 항목)와 예상 크기 계산
+    units = []
+    for _, dept_df in df.groupby('department', sort=False):
+        dept_size = _size(render(dept_df)) - header_size
+        if dept_size + header_size <= max_bytes and len(dept_df) <= max_items:
+            units.append((dept_df.index, dept_size))
+            continue
+        for index in dept_df.index:
+            row_df = df.loc[[index]]
+            units.append((row_df.index, _size(render(row_df)) - header_size))
+
+    # 순서를 유지하며 한도 안에서 최대한 채움
+    chunks, current, current_size = [], [], header_size
+    for unit_index, unit_size in units:
+        if current and (current_size + unit_size > max_bytes or len(current) + len(unit_index) > max_items):
+            chunks.append(current)
+            current, current_size = [], header_size
+        current.extend(unit_index)
+        current_size += unit_size
+    if current:
+        chunks.append(current)
+
+    parts = []
+    for chunk in chunks:
+        part_df = df.loc[chunk]
+        parts.append((part_df, render(part_df)))
+    return parts
+
+
+def split_digest(df, render, subject: str, max_bytes: int = DEFAULT_MAX_PAGE_BYTES,
+                 max_items: int = DEFAULT_MAX_PAGE_ITEMS):
+    """
+    다이제스트를 (부모 페이지 내용, [(하위 페이지 제목, 내용), ...]) 으로 나눕니다.
+    한 페이지에 들어가면 하위 페이지 없이 전체 마크다운을 그대로 반환합니다.
+    """
+    parts = paginate_digest(df, render, max_bytes, max_items)
+    if len(parts) == 1:
+        return parts[0][1], []
+
+    total = len(parts)
+    children = []
+    index_output = render(df.iloc[:0])
+    index_output += f"전체 {len(df)}건이 {total}개 하위 페이지로 나뉘어 있습니다.\n\n"
+    for i, (part_df, content) in enumerate(parts, start=1):
+        child_subject = f"{subject} ({i}/{total})"
+        children.append((child_subject, content))
+        departments = ", ".join(dict.fromkeys(part_df['department']))
+        index_output += f"{i}. **{child_subject}** - {departments} ({len(part_df)}건)\n"
+    return index_output, children
@@ -0,0 +1,124 @@
+import hashlib
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import jinja2
+import pandas as pd
+
+# ----- 다이제스트 템플릿 -----
+# 설정마다 templates/<이름>.md.j2 템플릿을 골라 다이제스트 모양을 바꿀 수 있습니다.
+# 템플릿은 내용 해시 기준으로 한 번만 컴파일해 재사용하므로 설정이 많아도 렌더링마다 다시 해석하지 않습니다.
+TEMPLATE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+TEMPLATE_SUFFIX = ".md.j2"
+DEFAULT_TEMPLATE = "default"
+
+
+def _table_cell(value) -> str:
+    """
+    마크다운 표 칸에 넣을 수 있도록 줄바꿈과 | 를 바꿉니다.
+    """
+    return " ".join(str(value).split()).replace("|", "\\|")
+
+
+_env = jinja2.Environment(
+    autoescape=False,
+    trim_blocks=True,
+    lstrip_blocks=True,
+    keep_trailing_newline=True,
+    undefined=jinja2.StrictUndefined,
+)
+_env.filters["cell"] = _table_cell
+
+_lock = threading.Lock()
+_compiled = {}      # 템플릿 내용 해시 -> 컴파일된 템플릿
+_sources = {}       # 템플릿 파일 경로 -> (수정 시각, 내용 해시)
+
+
+def list_templates(folder: str = TEMPLATE_FOLDER) -> list:
+    try:
+        return sorted(name[:-len(TEMPLATE_SUFFIX)] for name in os.listdir(folder) if name.endswith(TEMPLATE_SUFFIX))
+    except OSError:
+        return []
+
+
+def compile_template(source: str):
+    """
+    템플릿 문자열을 컴파일합니다. 같은 내용은 한 번만 컴파일합니다.
+    """
+    key = hashlib.sha256(source.encode("utf-8")).hexdigest()
+    with _lock:
+        template = _compiled.get(key)
+        if template is None:
+            template = _compiled[key] = _env.from_string(source)
+        return template
+
+
+def get_template(name: str = DEFAULT_TEMPLATE, folder: str = TEMPLATE_FOLDER):
+    """
+    이름에 해당하는 템플릿을 반환합니다. 파일이 바뀌지 않았으면 다시 읽거나 컴파일하지 않습니다.
+    없는 이름이면 기본 템플릿을 씁니다.
+    """
+    path = os.path.join(folder, f"{os.path.basename(name or DEFAULT_TEMPLATE)}{TEMPLATE_SUFFIX}")
+    if not os.path.exists(path):
+        print(f"템플릿을 찾을 수 없어 기본 템플릿을 사용합니다: {name}")
+        path = os.path.join(folder, f"{DEFAULT_TEMPLATE}{TEMPLATE_SUFFIX}")
+    mtime = os.stat(path).st_mtime
+    with _lock:
+        cached = _sources.get(path)
+        if cached and cached[0] == mtime:
+            return _compiled[cached[1]]
+    with open(path, "r", encoding="utf-8") as f:
+        source = f.read()
+    template = compile_template(source)
+    with _lock:
+        _sources[path] = (mtime, hashlib.sha256(source.encode("utf-8")).hexdigest())
+    return template
+
+
+def build_context(df, start_time, korea_time, stale=None, attachments=None, department_order=None) -> dict:
+    """
+    템플릿에 넘길 값을 만듭니다.
+    groups: [{"department", "stale", "entries": [{"title", "link", "published", "summary", "departments", "attachments"}]}]
+    department_order 에 있는 부서를 그 순서대로 먼저, 나머지는 처음 나온 순서대로 놓습니다.
+    """
+    stale = stale or {}
+    attachments = attachments or {}
+    stale_notices = [
+        f"{dept} (마지막 수집 {datetime.fromtimestamp(last_success_at, ZoneInfo('Asia/Seoul')).strftime('%m-%d %H:%M')})"
+        if last_success_at else f"{dept} (수집 기록 없음)"
+        for dept, last_success_at in stale.items()
+    ]
+
+    grouped = defaultdict(list)
+    for _, row in df.iterrows():
+        departments = row.get('departments')
+        summary = row['summary']
+        grouped[row['department']].append({
+            "title": row['title'],
+            "link": row['link'],
+            "published": pd.to_datetime(row['published']),
+            "summary": summary if isinstance(summary, str) else "",
+            "departments": departments if isinstance(departments, list) else [row['department']],
+            "attachments": attachments.get(row['link'], []),
+        })
+
+    order = [dept for dept in (department_order or []) if dept in grouped]
+    order += [dept for dept in grouped if dept not in order]
+    return {
+        "start_label": start_time.strftime('%y%m%d'),
+        "end_label": korea_time.strftime('%y%m%d'),
+        "stale_notices": stale_notices,
+        "groups": [{"department": dept, "stale": dept in stale, "entries": grouped[dept]} for dept in order],
+    }
+
+
+def render_digest(df, start_time, korea_time, stale=None, attachments=None, template: str = DEFAULT_TEMPLATE,
+                  department_order=None) -> str:
+    """
+    설정의 템플릿으로 다이제스트 마크다운을 만듭니다. (컴파일된 템플릿을 한 번에 흘려 쓰며 렌더링)
+    """
+    context = build_context(df, start_time, korea_time, stale, attachments, department_order)
+    return "".join(get_template(template).generate(**context))
@@ -1,5 +1,30 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 
+from singleflight import get_group
+
+# ----- 파일 다운로드 설정 -----
+DOWNLOAD_PARTS = 4                      # 동시에 받는 범위 수
+DOWNLOAD_MIN_PART_SIZE = 4 * 1024 * 1024  # 이보다 작은 범위로는 나누지 않음
+DOWNLOAD_MIN_CHUNK = 64 * 1024
+DOWNLOAD_MAX_CHUNK = 4 * 1024 * 1024
+DOWNLOAD_TARGET_CHUNK_SECONDS = 0.5     # 읽기 한 번에 걸리는 시간이 이 정도가 되도록 크기 조정
+DOWNLOAD_RETRIES = 3
+DOWNLOAD_TIMEOUT = 60
+
+_dooray_flight = get_group("dooray")
+
+class _RangeNotSupported(Exception):
+    """
+    서버가 Range 요청을 무시하고 파일 전체(200)를 보낸 경우
+    """
+
+
 class DoorayAPIClient:
     def __init__(self, token: str, base_url: str = "https://api.dooray.co.kr"):
         self.token = token
@@ -14,6 +39,15 @@ class DoorayAPIClient:
         if extra_headers:
             headers.update(extra_headers)
 
+        if method == "GET":
+            # 같은 토큰으로 같은 조회를 동시에 보내면 한 번만 요청하고 결과를 나눠 받음
+            key = (self.token, url, json.dumps(params or {}, sort_keys=True, default=str),
+                   json.dumps(extra_headers or {}, sort_keys=True))
+            return _dooray_flight.do(key, self._send, method, url, params, data, json_data, files, headers)
+        return self._send(method, url, params, data, json_data, files, headers)
+
+    @staticmethod
+    def _send(method, url, params, data, json_data, files, headers):
         response = requests.request(method, url, params=params, data=data, json=json_data, files=files, headers=headers)
         response.raise_for_status()
         return response.json()
@@ -118,24 +152,143 @@ class DoorayAPIClient:
         params = {"media": "meta"}
         return self._request("GET", endpoint, params=params)
 
-    def download_file(self, drive_id: str, file_id: str, save_path: str):
+    def _resolve_download_url(self, url: str, params: dict, headers: dict):
         """
-        파일 다운로드 시에도 307 응답을 확인하여 재요청합니다.
+        다운로드 URL 의 307 응답을 확인해 실제 파일 위치를 반환합니다.
         """
-        download_url = f"https://api.dooray.co.kr/drive/v1/drives/{drive_id}/files/{file_id}"
-        params = {"media": "raw"}
-        headers = {"Authorization": f"dooray-api {self.token}"}
-        # 자동 리디렉션 비활성화
-        response = requests.get(download_url, params=params, headers=headers, stream=True, allow_redirects=False)
+        response = requests.get(url, params=params, headers=headers, stream=True, allow_redirects=False)
+        response.close()
         if response.status_code == 307:
             location = response.headers.get("location")
             if not location:
                 raise Exception("307 응답이지만 location 헤더가 없습니다.")
-            response = requests.get(location, params=params, headers=headers, stream=True)
+            return location
         response.raise_for_status()
-        with open(save_path, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        return url
+
+    def _download_range(self, url: str, params: dict, headers: dict, save_path: str, part: dict, on_progress,
+                        whole_file: bool = False):
+        """
+        part 의 남은 바이트 범위를 받아 파일의 해당 위치에 씁니다.
+        처리량에 맞춰 읽기 크기를 늘리거나 줄입니다.
+        whole_file 이면(범위가 파일 전체) 처음 받을 때는 Range 없이 받고,
+        서버가 Range 를 무시하고 전체를 보내도 처음부터 다시 씁니다.
+        """
+        start = part["start"] + part["done"]
+        if start > part["end"]:
+            return
+        request_headers = headers if whole_file and start == 0 else {**headers, "Range": f"bytes={start}-{part['end']}"}
+        chunk_size = DOWNLOAD_MIN_CHUNK
+        with requests.get(url, params=params, headers=request_headers, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+            response.raise_for_status()
+            if response.status_code != 206 and start != 0:
+                if not whole_file:
+                    raise _RangeNotSupported()
+                # 이어받기를 지원하지 않으면 처음부터 다시 받음
+                on_progress(part, -part["done"])
+                start = 0
+            with open(save_path, "r+b") as f:
+                f.seek(start)
+                while part["done"] < part["end"] - part["start"] + 1:
+                    began = time.monotonic()
+                    chunk = response.raw.read(chunk_size)
+                    if not chunk:
+                        raise Exception("다운로드가 중간에 끊겼습니다.")
+                    f.write(chunk)
+                    # 진행 상황에 적기 전에 파일에 내려씀 (중단되면 기록한 위치까지는 실제로 받은 상태)
+                    f.flush()
+                    on_progress(part, len(chunk))
+                    # 빨리 받으면 읽기 크기를 키우고, 느리면 줄여서 진행 상황을 자주 기록
+                    elapsed = time.monotonic() - began
+                    if elapsed < DOWNLOAD_TARGET_CHUNK_SECONDS / 2:
+                        chunk_size = min(DOWNLOAD_MAX_CHUNK, chunk_size * 2)
+                    elif elapsed > DOWNLOAD_TARGET_CHUNK_SECONDS * 2:
+                        chunk_size = max(DOWNLOAD_MIN_CHUNK, chunk_size // 2)
+
+    def download_file(self, drive_id: str, file_id: str, save_path: str, parts: int = DOWNLOAD_PARTS):
+        """
+        파일 다운로드 시에도 307 응답을 확인하여 재요청합니다.
+        큰 파일은 여러 범위(Range)로 나눠 동시에 받고, 진행 상황을 `<save_path>.progress.json` 에 기록해
+        중단된 경우 다음 호출에서 이어받습니다. 받은 크기는 get_file_meta 의 크기와 비교해 검증합니다.
+        """
+        download_url = f"https://api.dooray.co.kr/drive/v1/drives/{drive_id}/files/{file_id}"
+        params = {"media": "raw"}
+        headers = {"Authorization": f"dooray-api {self.token}"}
+        size = self.get_file_meta(drive_id, file_id)["result"]["size"]
+        part_path = f"{save_path}.part"
+        progress_path = f"{save_path}.progress.json"
+
+        # 이전에 받던 같은 파일의 진행 상황이 있으면 이어받음
+        progress = None
+        if os.path.exists(part_path):
+            try:
+                with open(progress_path, "r", encoding="utf-8") as f:
+                    progress = json.load(f)
+            except (OSError, ValueError):
+                progress = None
+        if not progress or progress.get("file_id") != file_id or progress.get("size") != size:
+            count = max(1, min(parts, size // DOWNLOAD_MIN_PART_SIZE))
+            bounds = [size * i // count for i in range(count + 1)]
+            progress = {
+                "file_id": file_id,
+                "size": size,
+                "parts": [{"start": bounds[i], "end": bounds[i + 1] - 1, "done": 0} for i in range(count)],
+            }
+            # 출력 파일을 미리 전체 크기로 만들어 두고 각 범위를 제자리에 씀
+            with open(part_path, "wb") as f:
+                f.truncate(size)
+
+        lock = threading.Lock()
+
+        def save_progress():
+            tmp_path = f"{progress_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(progress, f)
+            os.replace(tmp_path, progress_path)
+
+        def on_progress(part, length):
+            with lock:
+                part["done"] += length
+                save_progress()
+
+        save_progress()
+        url = self._resolve_download_url(download_url, params, headers)
+
+        def fetch(part):
+            whole_file = len(progress["parts"]) == 1
+            for attempt in range(DOWNLOAD_RETRIES):
+                try:
+                    return self._download_range(url, params, headers, part_path, part, on_progress, whole_file)
+                except _RangeNotSupported:
+                    raise
+                except Exception:
+                    # 끊긴 범위는 기록된 위치부터 다시 받음
+                    if attempt == DOWNLOAD_RETRIES - 1:
+                        raise
+                    time.sleep(2 ** attempt)
+
+        def fetch_pending():
+            pending = [part for part in progress["parts"] if part["done"] < part["end"] - part["start"] + 1]
+            if pending:
+                with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+                    for future in [executor.submit(fetch, part) for part in pending]:
+                        future.result()
+
+        try:
+            fetch_pending()
+        except _RangeNotSupported:
+            # 범위 요청을 지원하지 않는 서버면 나누지 않고 처음부터 한 번에 받음
+            progress["parts"] = [{"start": 0, "end": size - 1, "done": 0}]
+            save_progress()
+            fetch_pending()
+
+        received = sum(part["done"] for part in progress["parts"])
+        if received != size or os.path.getsize(part_path) != size:
+            os.remove(part_path)
+            os.remove(progress_path)
+            raise Exception(f"파일 크기가 일치하지 않습니다. (예상 {size}, 받은 크기 {received})")
+        os.replace(part_path, save_path)
+        os.remove(progress_path)
         return f"파일이 {save_path}에 저장되었습니다."
 
     def update_file_name(self, drive_id: str, file_id: str, new_name: str):
@@ -0,0 +1,235 @@
+import hashlib
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urlparse
+
+import requests
+
+from cluster import SQLITE_JOURNAL_MODE
+
+# ----- 첨부파일 미러링 -----
+# 보도자료 첨부파일(PDF/HWP/이미지 등)을 받아 Dooray 위키에 올리고 다이제스트에 링크합니다.
+# 파일은 내용 해시로 저장하므로 같은 파일은 설정/위키/날짜가 달라도 한 번만 받고, 위키마다 한 번만 올립니다.
+ENCLOSURE_CACHE_DIR = os.environ.get("ENCLOSURE_CACHE_DIR", "enclosure_cache")
+ENCLOSURE_CACHE_DB_PATH = os.environ.get("ENCLOSURE_CACHE_DB_PATH", "enclosure_cache.db")
+DEFAULT_MAX_FILE_BYTES = int(os.environ.get("ENCLOSURE_MAX_FILE_BYTES", 20 * 1024 * 1024))    # 파일 하나 상한
+DEFAULT_RUN_BUDGET_BYTES = int(os.environ.get("ENCLOSURE_RUN_BUDGET_BYTES", 200 * 1024 * 1024))  # 실행 한 번에 새로 받는 총량
+ENCLOSURE_MAX_WORKERS = 4
+ENCLOSURE_TIMEOUT_SECONDS = 30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS downloads (
+    url TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    file_name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    downloaded_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS uploads (
+    sha256 TEXT NOT NULL,
+    wiki_id TEXT NOT NULL,
+    file_id TEXT NOT NULL,
+    uploaded_at REAL NOT NULL,
+    PRIMARY KEY (sha256, wiki_id)
+);
+"""
+
+# 같은 URL/파일을 여러 설정이 동시에 처리할 때 한 번만 받고 올리도록 키별 잠금
+_key_locks = defaultdict(threading.Lock)
+_key_locks_guard = threading.Lock()
+
+
+def _key_lock(key: str):
+    with _key_locks_guard:
+        return _key_locks[key]
+
+
+def _connect(db_path: str = ENCLOSURE_CACHE_DB_PATH):
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+class ByteBudget:
+    """
+    실행 한 번에 새로 내려받을 수 있는 총 바이트 수입니다. (캐시에서 꺼낸 파일은 차감하지 않음)
+    """
+    def __init__(self, total_bytes: int = DEFAULT_RUN_BUDGET_BYTES):
+        self.remaining = total_bytes
+        self.lock = threading.Lock()
+
+    def take(self, size: int) -> bool:
+        with self.lock:
+            if size > self.remaining:
+                return False
+            self.remaining -= size
+            return True
+
+    def refund(self, size: int):
+        with self.lock:
+            self.remaining += size
+
+
+def _file_name(response, url: str) -> str:
+    """
+    Content-Disposition(filename* / filename) 또는 URL 경로에서 파일 이름을 정합니다.
+    """
+    disposition = response.headers.get("Content-Disposition", "")
+    match = re.search(r"filename\*=(?:UTF-8|utf-8)''([^;]+)", disposition)
+    if match:
+        name = unquote(match.group(1))
+    else:
+        match = re.search(r'filename="?([^";]+)"?', disposition)
+        if match:
+            name = match.group(1)
+            try:
+                # 인코딩을 밝히지 않은 한글 이름은 보통 UTF-8 바이트가 latin-1 로 들어옴
+                name = name.encode("latin-1").decode("utf-8")
+            except (UnicodeEncodeError, UnicodeDecodeError):
+                pass
+        else:
+            name = unquote(os.path.basename(urlparse(url).path))
+    name = re.sub(r'[\\/:*?"<>|\r\n]+', "_", name).strip()
+    return name or "attachment"
+
+
+def _cached_download(url: str, db_path: str):
+    conn = _connect(db_path)
+    try:
+        row = conn.execute("SELECT sha256, file_name FROM downloads WHERE url = ?", (url,)).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    path = os.path.join(ENCLOSURE_CACHE_DIR, row[0], row[1])
+    return (row[0], path) if os.path.exists(path) else None
+
+
+def download_enclosure(url: str, max_file_bytes: int, budget: ByteBudget, db_path: str = ENCLOSURE_CACHE_DB_PATH):
+    """
+    첨부파일을 받아 내용 해시 폴더에 저장합니다. 이미 받은 URL 은 다시 받지 않습니다.
+    반환값: (sha256, 파일 경로). 크기 상한/예산을 넘거나 실패하면 None.
+    """
+    with _key_lock(f"url:{url}"):
+        cached = _cached_download(url, db_path)
+        if cached:
+            return cached
+
+        with requests.get(url, stream=True, timeout=ENCLOSURE_TIMEOUT_SECONDS) as response:
+            response.raise_for_status()
+            length = int(response.headers.get("Content-Length") or 0)
+            if length > max_file_bytes:
+                print(f"첨부파일이 너무 커서 건너뜀 ({length} bytes): {url}")
+                return None
+            # 크기를 미리 알면 그만큼, 모르면 상한만큼 예산을 잡고 받은 뒤 남는 만큼 돌려줌
+            reserved = length or max_file_bytes
+            if not budget.take(reserved):
+                print(f"첨부파일 예산을 넘어 건너뜀: {url}")
+                return None
+
+            os.makedirs(ENCLOSURE_CACHE_DIR, exist_ok=True)
+            tmp_path = os.path.join(ENCLOSURE_CACHE_DIR, f".{uuid.uuid4().hex}.tmp")
+            digest = hashlib.sha256()
+            size = 0
+            try:
+                with open(tmp_path, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        size += len(chunk)
+                        if size > reserved:
+                            print(f"첨부파일이 너무 커서 건너뜀 (>{reserved} bytes): {url}")
+                            return None
+                        digest.update(chunk)
+                        f.write(chunk)
+                sha256 = digest.hexdigest()
+                file_name = _file_name(response, url)
+                path = os.path.join(ENCLOSURE_CACHE_DIR, sha256, file_name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                shutil.move(tmp_path, path)
+            finally:
+                budget.refund(max(0, reserved - size))
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+        conn = _connect(db_path)
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO downloads (url, sha256, file_name, size, downloaded_at) VALUES (?, ?, ?, ?, ?)",
+                (url, sha256, file_name, size, time.time()),
+            )
+        finally:
+            conn.close()
+        return sha256, path
+
+
+def upload_to_wiki(client, wiki_id: str, sha256: str, path: str, db_path: str = ENCLOSURE_CACHE_DB_PATH) -> str:
+    """
+    파일을 위키에 올리고 파일 ID 를 반환합니다. 같은 내용의 파일은 위키마다 한 번만 올립니다.
+    """
+    with _key_lock(f"upload:{sha256}:{wiki_id}"):
+        conn = _connect(db_path)
+        try:
+            row = conn.execute("SELECT file_id FROM uploads WHERE sha256 = ? AND wiki_id = ?", (sha256, wiki_id)).fetchone()
+        finally:
+            conn.close()
+        if row:
+            return row[0]
+
+        response = client.upload_wiki_file(wiki_id, path)
+        if not response.get("header", {}).get("isSuccessful", True):
+            raise Exception(f"첨부파일 업로드 실패: {response.get('header')}")
+        file_id = response["result"]["id"]
+
+        conn = _connect(db_path)
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO uploads (sha256, wiki_id, file_id, uploaded_at) VALUES (?, ?, ?, ?)",
+                (sha256, wiki_id, file_id, time.time()),
+            )
+        finally:
+            conn.close()
+        return file_id
+
+
+def mirror_enclosures(client, wiki_id: str, df, max_file_bytes: int = DEFAULT_MAX_FILE_BYTES, budget: ByteBudget = None,
+                      max_workers: int = ENCLOSURE_MAX_WORKERS, db_path: str = ENCLOSURE_CACHE_DB_PATH) -> dict:
+    """
+    항목들의 첨부파일을 동시에 받아 위키에 올립니다. 실패한 파일은 건너뜁니다.
+    반환값: {항목 link: [{"name": 파일 이름, "file_id": Dooray 파일 ID}]}
+    """
+    if df is None or df.empty or 'enclosures' not in df:
+        return {}
+    budget = budget or ByteBudget()
+    jobs = [
+        (row.link, enclosure)
+        for row in df[['link', 'enclosures']].itertuples(index=False)
+        for enclosure in (row.enclosures or [])
+        if not enclosure.get('length') or enclosure['length'] <= max_file_bytes
+    ]
+
+    def mirror(job):
+        link, enclosure = job
+        try:
+            downloaded = download_enclosure(enclosure['url'], max_file_bytes, budget, db_path)
+            if downloaded is None:
+                return None
+            sha256, path = downloaded
+            return link, {"name": os.path.basename(path), "file_id": upload_to_wiki(client, wiki_id, sha256, path, db_path)}
+        except Exception as e:
+            print(f"첨부파일 처리 중 오류 발생 ({enclosure['url']}): {e}")
+            return None
+
+    attachments = defaultdict(list)
+    if jobs:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for result in executor.map(mirror, jobs):
+                if result:
+                    attachments[result[0]].append(result[1])
+    return dict(attachments)
@@ -0,0 +1,267 @@
+import html
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from zoneinfo import ZoneInfo
+
+import feedparser
+import pandas as pd
+import requests
+from bs4 import BeautifulSoup
+
+from cluster import acquire_lease, release_lease, wait_for_lease
+from feed_registry import load_feeds, load_rss_url_dict, next_poll_state, poll_bounds
+from feed_store import load_entries, load_poll_states, save_entries, save_poll_state
+from singleflight import get_group
+
+POLL_MAX_WORKERS = 8              # 동시에 수집하는 피드 수
+CATCHUP_MAX_AGE_SECONDS = 15 * 60  # 발송 시 이보다 오래 수집되지 않은 피드만 보충 수집
+CATCHUP_TIMEOUT_SECONDS = 20       # 보충 수집을 기다리는 최대 시간
+FEED_TIMEOUT_SECONDS = 10          # 피드 하나의 요청 제한 시간
+
+# ----- 피드별 상태 감시 (서킷 브레이커) -----
+HEALTH_SMOOTHING = 0.3             # 응답 시간/오류율 EWMA 가중치
+CIRCUIT_FAILURE_THRESHOLD = 3      # 연속 실패가 이만큼이면 한동안 호출하지 않음
+CIRCUIT_COOLDOWN_SECONDS = 5 * 60  # 첫 차단 시간 (이후 실패할 때마다 2배)
+CIRCUIT_MAX_COOLDOWN_SECONDS = 60 * 60
+
+# 주기 수집과 발송 시 보충 수집이 같은 피드를 동시에 요청하면 한 번만 보냄
+_feed_flight = get_group("feed")
+
+
+def clean_summary(summary_html):
+    """
+    HTML 요약 정보를 정리하는 함수
+    """
+    try:
+        soup = BeautifulSoup(summary_html, 'html5lib')
+
+        # 이미지나 링크 등 불필요한 요소 제거
+        for tag in soup(['a', 'img', 'figure', 'figcaption', 'div']):
+            tag.decompose()
+
+        # 텍스트만 추출 + HTML entity 복호화
+        clean_text = html.unescape(soup.get_text(separator=' ', strip=True))
+
+        # 공백 정리
+        clean_text = ' '.join(clean_text.split())
+
+        return clean_text
+    except Exception as e:
+        print(f"요약 정리 중 오류 발생: {e}")
+        return summary_html
+
+
+def _entry_enclosures(entry):
+    """
+    항목에 딸린 첨부파일(PDF/HWP/이미지 등) 목록을 [{"url", "type", "length"}] 형태로 반환합니다.
+    """
+    enclosures = []
+    for enclosure in entry.get('enclosures', []):
+        url = enclosure.get('href') or enclosure.get('url')
+        if url and url not in [e['url'] for e in enclosures]:
+            try:
+                length = int(enclosure.get('length') or 0)
+            except ValueError:
+                length = 0
+            enclosures.append({'url': url, 'type': enclosure.get('type', ''), 'length': length})
+    return enclosures
+
+
+def _feed_entries(dept_name, feed):
+    return [
+        {
+            'department': dept_name,
+            'title': entry.title,
+            'link': entry.link,
+            'published': entry.published,
+            'summary': entry.summary if hasattr(entry, 'summary') else '',
+            'enclosures': _entry_enclosures(entry)
+        }
+        for entry in feed.entries
+    ]
+
+
+def _entries_to_df(all_entries):
+    """
+    수집한 항목을 DataFrame 으로 만들고 요약 정리 및 한국 시간 변환을 합니다.
+    """
+    if not all_entries:
+        return pd.DataFrame()
+
+    rss_df = pd.DataFrame(all_entries)
+    rss_df['summary'] = rss_df['summary'].apply(clean_summary)
+
+    # 한국 시간대로 변환
+    kst = ZoneInfo("Asia/Seoul")
+    rss_df['published'] = pd.to_datetime(rss_df['published'], utc=True).dt.tz_convert(kst)
+
+    return rss_df
+
+
+def fetch_feed(dept_name, rss_url, etag=None, modified=None, timeout: float = FEED_TIMEOUT_SECONDS):
+    """
+    피드 하나를 조건부 요청(ETag / Last-Modified)으로 가져옵니다. 느린 피드는 timeout 초 뒤 실패로 처리합니다.
+    반환값: (DataFrame, 새 etag, 새 modified). 변경이 없으면(304) 빈 DataFrame.
+    """
+    return _feed_flight.do((dept_name, rss_url, etag, modified), _fetch_feed, dept_name, rss_url, etag, modified, timeout)
+
+
+def _fetch_feed(dept_name, rss_url, etag, modified, timeout):
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if modified:
+        headers["If-Modified-Since"] = modified
+    response = requests.get(rss_url, headers=headers, timeout=timeout)
+    if response.status_code == 304:
+        return pd.DataFrame(), etag, modified
+    response.raise_for_status()
+    feed = feedparser.parse(response.content)
+    if feed.bozo and not feed.entries:
+        raise Exception(feed.get("bozo_exception", "피드를 해석할 수 없습니다."))
+    return _entries_to_df(_feed_entries(dept_name, feed)), response.headers.get("ETag"), response.headers.get("Last-Modified")
+
+
+def _ewma(previous, value):
+    return value if previous is None else HEALTH_SMOOTHING * value + (1 - HEALTH_SMOOTHING) * previous
+
+
+def record_success(state: dict, latency: float, now: float) -> dict:
+    """
+    수집 성공을 상태에 반영하고 차단을 풉니다.
+    """
+    return {
+        **state,
+        "latency_ewma": _ewma(state.get("latency_ewma"), latency),
+        "error_rate": _ewma(state.get("error_rate"), 0.0),
+        "failures": 0,
+        "circuit_open_until": 0,
+        "last_success_at": now,
+        "last_error": "",
+    }
+
+
+def record_failure(state: dict, latency: float, now: float, error: str = "") -> dict:
+    """
+    수집 실패를 상태에 반영합니다. 연속 실패가 기준을 넘으면 일정 시간 이 피드를 호출하지 않습니다.
+    """
+    failures = state.get("failures", 0) + 1
+    circuit_open_until = state.get("circuit_open_until", 0)
+    if failures >= CIRCUIT_FAILURE_THRESHOLD:
+        cooldown = CIRCUIT_COOLDOWN_SECONDS * 2 ** (failures - CIRCUIT_FAILURE_THRESHOLD)
+        circuit_open_until = now + min(CIRCUIT_MAX_COOLDOWN_SECONDS, cooldown)
+    return {
+        **state,
+        "latency_ewma": _ewma(state.get("latency_ewma"), latency),
+        "error_rate": _ewma(state.get("error_rate"), 1.0),
+        "failures": failures,
+        "circuit_open_until": circuit_open_until,
+        "last_error": error,
+    }
+
+
+def circuit_open(state: dict, now: float) -> bool:
+    return state.get("circuit_open_until", 0) > now
+
+
+def stale_feeds(states=None, now=None) -> dict:
+    """
+    수집이 밀려 저장소의 항목이 오래된 피드와 마지막 성공 시각을 반환합니다. 형식: {피드 이름: 마지막 성공 시각 또는 None}
+    차단(circuit) 중이거나, 실패가 이어져 마지막 성공 후 수집 주기에 재시도 한 번(최소 주기)을 더한 시간이 지난 피드입니다.
+    한 번 실패했다가 재시도에서 바로 성공하는 피드는 표시하지 않습니다.
+    이 피드들은 저장소에 남아 있는 이전 수집분으로 발송되므로 다이제스트에 지연 표시를 합니다.
+    """
+    states = load_poll_states() if states is None else states
+    now = time.time() if now is None else now
+    stale = {}
+    for feed in load_feeds():
+        state = states.get(feed["name"], {})
+        if not feed["enabled"] or state.get("failures", 0) == 0:
+            continue
+        min_seconds, _ = poll_bounds(feed)
+        last_success_at = state.get("last_success_at")
+        overdue = last_success_at is None or now - last_success_at > state.get("poll_interval", min_seconds) + min_seconds
+        if circuit_open(state, now) or overdue:
+            stale[feed["name"]] = last_success_at
+    return stale
+
+
+def _poll_feed(feed, state):
+    """
+    피드 하나를 수집해 저장하고 수집 상태를 갱신합니다. 반환값: (피드 이름, 새 항목 수 또는 실패 시 None)
+    """
+    started_at = time.monotonic()
+    try:
+        rss_df, etag, modified = fetch_feed(feed["name"], feed["url"], state.get("etag"), state.get("modified"))
+        new_items = save_entries(rss_df)
+    except Exception as e:
+        print(f"{feed['name']} RSS 수집 중 오류 발생: {e}")
+        now = time.time()
+        state = record_failure(state, time.monotonic() - started_at, now, str(e))
+        # 실패한 피드는 최소 주기 뒤(차단 중이면 차단이 풀린 뒤) 다시 시도 (발행률은 유지)
+        state["next_poll_at"] = max(now + poll_bounds(feed)[0], state["circuit_open_until"])
+        save_poll_state(feed["name"], state)
+        return feed["name"], None
+    now = time.time()
+    state = record_success(state, time.monotonic() - started_at, now)
+    save_poll_state(feed["name"], {**next_poll_state(feed, state, new_items, now), "etag": etag, "modified": modified})
+    return feed["name"], new_items
+
+
+def poll_due_feeds(now=None, max_workers: int = POLL_MAX_WORKERS):
+    """
+    수집 시각이 된 피드만 가져와 저장소에 쌓고, 새 항목 수로 다음 수집 주기를 조정합니다.
+    반환값: {피드 이름: 새 항목 수 (실패 시 None)}
+    """
+    now = now or time.time()
+    states = load_poll_states()
+    due = [
+        feed for feed in load_feeds()
+        if feed["enabled"] and states.get(feed["name"], {}).get("next_poll_at", 0) <= now
+    ]
+    if not due:
+        return {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(executor.map(lambda feed: _poll_feed(feed, states.get(feed["name"], {})), due))
+
+
+def catch_up_feeds(max_age: float = CATCHUP_MAX_AGE_SECONDS, timeout: float = CATCHUP_TIMEOUT_SECONDS,
+                   max_workers: int = POLL_MAX_WORKERS):
+    """
+    마지막 수집이 max_age 초보다 오래된 피드만 짧게 다시 가져옵니다.
+    timeout 안에 끝나지 않은 피드는 기다리지 않고 저장된 데이터를 사용합니다. (수집은 뒤에서 계속 진행)
+    차단 중이거나 평소 응답이 timeout 보다 느린 피드는 호출하지 않고 바로 저장된 데이터를 씁니다.
+    """
+    now = time.time()
+    states = load_poll_states()
+    stale = [
+        feed for feed in load_feeds()
+        if feed["enabled"]
+        and now - states.get(feed["name"], {}).get("last_polled_at", 0) > max_age
+        and not circuit_open(states.get(feed["name"], {}), now)
+        and (states.get(feed["name"], {}).get("latency_ewma") or 0) < timeout
+    ]
+    if not stale:
+        return
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = [executor.submit(_poll_feed, feed, states.get(feed["name"], {})) for feed in stale]
+    done, not_done = wait(futures, timeout=timeout)
+    executor.shutdown(wait=False)
+    if not_done:
+        print(f"보충 수집 시간 초과: {len(not_done)}개 피드는 저장된 데이터를 사용합니다.")
+
+
+def load_feed_window(since, owner: str, catch_up: bool = True):
+    """
+    발송에 쓸 항목을 로컬 저장소에서 읽습니다. (네트워크 수집은 백그라운드 poll_due_feeds 가 담당)
+    catch_up 이면 오래된 피드만 짧게 보충 수집하며, 여러 워커 중 한 곳만 수집하고 나머지는 끝나길 기다립니다.
+    """
+    if catch_up:
+        if acquire_lease("feed_catchup", owner, CATCHUP_TIMEOUT_SECONDS * 2):
+            try:
+                catch_up_feeds()
+            finally:
+                release_lease("feed_catchup", owner)
+        else:
+            wait_for_lease("feed_catchup", CATCHUP_TIMEOUT_SECONDS)
+    return load_entries(since, departments=list(load_rss_url_dict()))
@@ -0,0 +1,132 @@
+import json
+import os
+import threading
+
+# ----- 피드 목록 -----
+FEED_REGISTRY_PATH = os.environ.get("FEED_REGISTRY_PATH", "feed_registry.json")
+
+# 목록 파일이 없을 때 사용하는 기본 피드
+DEFAULT_FEEDS = [
+    {"name": "금융위원회", "url": "https://www.korea.kr/rss/dept_fsc.xml"},
+    {"name": "기획재정부", "url": "https://www.korea.kr/rss/dept_moef.xml"},
+    {"name": "산업통상자원부", "url": "https://www.korea.kr/rss/dept_motie.xml"},
+    {"name": "과학기술정보통신부", "url": "https://www.korea.kr/rss/dept_msit.xml"},
+    {"name": "중소벤처기업부", "url": "https://www.korea.kr/rss/dept_mss.xml"},
+    {"name": "탄소중립녹색성장 위원회", "url": "https://www.korea.kr/rss/dept_cnc.xml"},
+]
+
+# ----- 적응형 수집 주기 -----
+MIN_POLL_SECONDS = 5 * 60          # 바쁜 부서도 이보다 자주 수집하지 않음
+MAX_POLL_SECONDS = 6 * 60 * 60     # 조용한 부서도 이 간격 안에는 한 번 수집
+TARGET_NEW_ITEMS_PER_POLL = 1.0    # 수집 1회에 새 항목이 평균 이 정도 나오도록 주기 조정
+RATE_SMOOTHING = 0.3               # 발행률 EWMA 가중치
+
+FEED_FIELDS = ["name", "url", "enabled", "description", "min_poll_minutes", "max_poll_minutes"]
+
+_lock = threading.Lock()
+
+
+def normalize_feed(feed: dict) -> dict:
+    """
+    피드 항목을 정해진 필드만 가진 형태로 정리합니다.
+    """
+    return {
+        "name": str(feed.get("name") or "").strip(),
+        "url": str(feed.get("url") or "").strip(),
+        "enabled": True if feed.get("enabled") is None else bool(feed["enabled"]),
+        "description": feed.get("description") or "",
+        "min_poll_minutes": feed.get("min_poll_minutes"),
+        "max_poll_minutes": feed.get("max_poll_minutes"),
+    }
+
+
+def load_feeds(path: str = FEED_REGISTRY_PATH) -> list:
+    """
+    피드 목록을 반환합니다. 파일이 없으면 기본 피드를 사용합니다.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return [normalize_feed(feed) for feed in json.load(f)]
+    except FileNotFoundError:
+        return [normalize_feed(feed) for feed in DEFAULT_FEEDS]
+    except (OSError, ValueError) as e:
+        print(f"피드 목록 로딩 중 오류 발생: {e}")
+        return [normalize_feed(feed) for feed in DEFAULT_FEEDS]
+
+
+def validate_feeds(feeds) -> list:
+    """
+    저장 전에 피드 목록을 검사하고 오류 메시지 목록을 반환합니다.
+    """
+    errors = []
+    names, urls = set(), set()
+    for feed in feeds:
+        if not feed["name"] or not feed["url"]:
+            errors.append("이름과 URL 은 비워둘 수 없습니다.")
+            continue
+        if not feed["url"].startswith(("http://", "https://")):
+            errors.append(f"{feed['name']}: URL 은 http(s):// 로 시작해야 합니다.")
+        if feed["name"] in names:
+            errors.append(f"{feed['name']}: 이름이 중복되었습니다.")
+        if feed["url"] in urls:
+            errors.append(f"{feed['name']}: URL 이 중복되었습니다.")
+        names.add(feed["name"])
+        urls.add(feed["url"])
+    return errors
+
+
+def save_feeds(feeds, path: str = FEED_REGISTRY_PATH):
+    feeds = [normalize_feed(feed) for feed in feeds]
+    with _lock:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(feeds, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, path)
+    return feeds
+
+
+def load_rss_url_dict(path: str = FEED_REGISTRY_PATH) -> dict:
+    """
+    사용 중인 피드를 기존 rss_url_dict 와 같은 {부서명: URL} 형태로 반환합니다.
+    """
+    return {feed["name"]: feed["url"] for feed in load_feeds(path) if feed["enabled"]}
+
+
+# ----- 적응형 수집 주기 계산 -----
+def poll_bounds(feed: dict):
+    """
+    피드의 (최소, 최대) 수집 간격(초)을 반환합니다.
+    """
+    min_seconds = (feed.get("min_poll_minutes") or 0) * 60 or MIN_POLL_SECONDS
+    max_seconds = (feed.get("max_poll_minutes") or 0) * 60 or MAX_POLL_SECONDS
+    return min_seconds, max(min_seconds, max_seconds)
+
+
+def next_poll_state(feed: dict, state: dict, new_items: int, now: float) -> dict:
+    """
+    이번 수집에서 새로 발견한 항목 수로 발행률(EWMA, 항목/초)을 갱신하고 다음 수집 시각을 정합니다.
+    새 항목이 자주 나오는 피드는 짧게, 조용한 피드는 길게 수집합니다.
+    """
+    min_seconds, max_seconds = poll_bounds(feed)
+    last_polled_at = state.get("last_polled_at")
+    rate = state.get("publish_rate")
+
+    if last_polled_at is None:
+        # 첫 수집은 한 번에 쌓인 항목이 들어오므로 발행률 계산에 쓰지 않음
+        interval = min_seconds
+    else:
+        elapsed = max(1.0, now - last_polled_at)
+        observed = new_items / elapsed
+        rate = observed if rate is None else RATE_SMOOTHING * observed + (1 - RATE_SMOOTHING) * rate
+        interval = TARGET_NEW_ITEMS_PER_POLL / rate if rate > 0 else max_seconds
+        # 한두 번 조용했다고 바로 최대 주기로 늘어나지 않도록 한 번에 2배까지만 늘림
+        interval = min(interval, state.get("poll_interval", min_seconds) * 2)
+
+    interval = min(max_seconds, max(min_seconds, interval))
+    return {
+        **state,
+        "publish_rate": rate,
+        "poll_interval": interval,
+        "last_polled_at": now,
+        "next_poll_at": now + interval,
+    }
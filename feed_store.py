@@ -0,0 +1,151 @@
+import json
+import os
+import sqlite3
+import time
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+from cluster import SQLITE_JOURNAL_MODE
+
+# ----- 수집한 피드 항목 저장소 -----
+# 백그라운드 수집이 하루 종일 쌓아두고, 발송 시에는 여기서 읽기만 합니다.
+# 여러 워커가 같은 파일을 보면 피드를 한 번만 수집해 공유합니다.
+# 항목은 지우지 않고 보관하므로 보도자료 검색 아카이브(news_archive.py)로도 씁니다.
+FEED_STORE_DB_PATH = os.environ.get("FEED_STORE_DB_PATH", "feed_store.db")
+
+ENTRY_COLUMNS = ['department', 'title', 'link', 'published', 'summary']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    department TEXT NOT NULL,
+    link TEXT NOT NULL,
+    title TEXT NOT NULL,
+    published TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    enclosures TEXT NOT NULL DEFAULT '[]',
+    PRIMARY KEY (department, link)
+);
+CREATE INDEX IF NOT EXISTS entries_published ON entries (published);
+CREATE INDEX IF NOT EXISTS entries_department_published ON entries (department, published);
+-- 제목/요약 전문 검색 색인 (entries 를 원본으로 쓰는 FTS5 외부 콘텐츠 테이블, 트리거로 자동 갱신)
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    title, summary, content='entries', content_rowid='rowid', tokenize='unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS entries_fts_insert AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts (rowid, title, summary) VALUES (new.rowid, new.title, new.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_fts_delete AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_fts (entries_fts, rowid, title, summary) VALUES ('delete', old.rowid, old.title, old.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_fts_update AFTER UPDATE ON entries BEGIN
+    INSERT INTO entries_fts (entries_fts, rowid, title, summary) VALUES ('delete', old.rowid, old.title, old.summary);
+    INSERT INTO entries_fts (rowid, title, summary) VALUES (new.rowid, new.title, new.summary);
+END;
+CREATE TABLE IF NOT EXISTS feed_poll_state (
+    name TEXT PRIMARY KEY,
+    state TEXT NOT NULL
+);
+"""
+
+
+def _connect(db_path: str = FEED_STORE_DB_PATH):
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    has_index = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'entries_fts'").fetchone()
+    conn.executescript(_SCHEMA)
+    if "enclosures" not in [row[1] for row in conn.execute("PRAGMA table_info(entries)")]:
+        # 첨부파일 열이 없던 이전 저장소
+        conn.execute("ALTER TABLE entries ADD COLUMN enclosures TEXT NOT NULL DEFAULT '[]'")
+    if not has_index:
+        # 검색 색인이 생기기 전에 쌓인 항목도 색인에 넣음
+        conn.execute("INSERT INTO entries_fts (entries_fts) VALUES ('rebuild')")
+    return conn
+
+
+def save_entries(rss_df, db_path: str = FEED_STORE_DB_PATH) -> int:
+    """
+    수집한 항목(정리된 요약, KST 시각)을 저장소에 upsert 합니다. 반환값: 새로 추가된 항목 수
+    """
+    now = time.time()
+    conn = _connect(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        before = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        if rss_df is not None and not rss_df.empty:
+            enclosures = rss_df['enclosures'] if 'enclosures' in rss_df else [[]] * len(rss_df)
+            rows = [
+                (row.department, row.link, row.title, row.published.isoformat(), row.summary or '', now,
+                 json.dumps(row_enclosures or [], ensure_ascii=False))
+                for row, row_enclosures in zip(rss_df[ENTRY_COLUMNS].itertuples(index=False), enclosures)
+            ]
+            conn.executemany(
+                "INSERT INTO entries (department, link, title, published, summary, fetched_at, enclosures) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(department, link) DO UPDATE SET title = excluded.title, "
+                "published = excluded.published, summary = excluded.summary, fetched_at = excluded.fetched_at, "
+                "enclosures = excluded.enclosures",
+                rows,
+            )
+        after = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        conn.execute("COMMIT")
+        return after - before
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def load_poll_states(db_path: str = FEED_STORE_DB_PATH) -> dict:
+    """
+    피드별 수집 상태(발행률, 다음 수집 시각, ETag 등)를 반환합니다. 형식: {피드 이름: 상태}
+    """
+    conn = _connect(db_path)
+    try:
+        return {name: json.loads(state) for name, state in conn.execute("SELECT name, state FROM feed_poll_state")}
+    finally:
+        conn.close()
+
+
+def save_poll_state(name: str, state: dict, db_path: str = FEED_STORE_DB_PATH):
+    conn = _connect(db_path)
+    try:
+        conn.execute(
+            "INSERT INTO feed_poll_state (name, state) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET state = excluded.state",
+            (name, json.dumps(state, ensure_ascii=False)),
+        )
+    finally:
+        conn.close()
+
+
+def load_entries(since=None, departments=None, db_path: str = FEED_STORE_DB_PATH):
+    """
+    저장소에서 since 이후 발행된 항목을 DataFrame(department, title, link, published, summary, enclosures)으로 반환합니다.
+    """
+    query = f"SELECT {', '.join(ENTRY_COLUMNS)}, enclosures FROM entries"
+    conditions, params = [], []
+    if since is not None:
+        # 시각은 모두 KST ISO 문자열로 저장하므로 문자열 비교로 범위를 거를 수 있음
+        conditions.append("published >= ?")
+        params.append(pd.Timestamp(since).tz_convert(ZoneInfo("Asia/Seoul")).isoformat())
+    if departments:
+        conditions.append(f"department IN ({', '.join('?' * len(departments))})")
+        params.extend(departments)
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY rowid"
+
+    conn = _connect(db_path)
+    try:
+        rss_df = pd.read_sql_query(query, conn, params=params)
+    finally:
+        conn.close()
+
+    if rss_df.empty:
+        return pd.DataFrame()
+    rss_df['published'] = pd.to_datetime(rss_df['published'], utc=True).dt.tz_convert(ZoneInfo("Asia/Seoul"))
+    rss_df['enclosures'] = rss_df['enclosures'].apply(json.loads)
+    return rss_df
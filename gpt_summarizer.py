@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+
+# ----- GPT 요약 설정 (환경 변수로 변경 가능) -----
+# GPT_BASE_URL 을 로컬 주소로 바꾸면 OpenAI 호환 가짜 서버로 테스트할 수 있습니다.
+GPT_BASE_URL = os.environ.get("GPT_BASE_URL", "https://api.openai.com/v1")
+GPT_MODEL = os.environ.get("GPT_MODEL", "gpt-4o-mini")
+GPT_CACHE_FOLDER = os.environ.get("GPT_CACHE_FOLDER", "gpt_cache")
+GPT_BATCH_SIZE = int(os.environ.get("GPT_BATCH_SIZE", "8"))              # 요청 1건에 묶는 항목 수
+GPT_MAX_WORKERS = int(os.environ.get("GPT_MAX_WORKERS", "4"))            # 동시 요청 수
+GPT_REQUESTS_PER_MINUTE = int(os.environ.get("GPT_REQUESTS_PER_MINUTE", "60"))
+GPT_TOKENS_PER_MINUTE = int(os.environ.get("GPT_TOKENS_PER_MINUTE", "60000"))
+GPT_TIMEOUT = float(os.environ.get("GPT_TIMEOUT", "30"))                 # 요청 1건 타임아웃 (초)
+GPT_DEADLINE = float(os.environ.get("GPT_DEADLINE", "120"))              # 요약 단계 전체 제한 시간 (초)
+
+
+class RateLimiter:
+    """
+    분당 요청 수와 분당 토큰 수를 동시에 제한하는 토큰 버킷입니다.
+    프로세스 전체에서 하나를 공유하므로 여러 설정을 처리해도 예산이 합산됩니다.
+    """
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.request_rate = requests_per_minute / 60.0
+        self.token_rate = tokens_per_minute / 60.0
+        self.request_capacity = float(requests_per_minute)
+        self.token_capacity = float(tokens_per_minute)
+        self.request_allowance = self.request_capacity
+        self.token_allowance = self.token_capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self.last_refill
+        self.last_refill = now
+        self.request_allowance = min(self.request_capacity, self.request_allowance + elapsed * self.request_rate)
+        self.token_allowance = min(self.token_capacity, self.token_allowance + elapsed * self.token_rate)
+
+    def acquire(self, tokens: int, deadline: float) -> bool:
+        """
+        예산이 확보될 때까지 대기합니다. deadline(time.monotonic 기준)까지 확보하지 못하면 False를 반환합니다.
+        """
+        # 한 번에 버킷 용량보다 큰 요청은 용량만큼만 차감
+        tokens = min(tokens, self.token_capacity)
+        while True:
+            with self.lock:
+                self._refill()
+                if self.request_allowance >= 1 and self.token_allowance >= tokens:
+                    self.request_allowance -= 1
+                    self.token_allowance -= tokens
+                    return True
+                wait_seconds = max(
+                    (1 - self.request_allowance) / self.request_rate if self.request_allowance < 1 else 0,
+                    (tokens - self.token_allowance) / self.token_rate if self.token_allowance < tokens else 0,
+                )
+            if time.monotonic() + wait_seconds > deadline:
+                return False
+            time.sleep(min(wait_seconds, 1.0))
+
+
+rate_limiter = RateLimiter(GPT_REQUESTS_PER_MINUTE, GPT_TOKENS_PER_MINUTE)
+
+
+def _hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _estimate_tokens(text: str) -> int:
+    """
+    한국어는 대략 글자 1개가 토큰 1개 수준이므로 글자 수로 보수적으로 추정합니다.
+    """
+    return len(text) + 20
+
+
+def _cache_path(content_hash: str, prompt_hash: str, cache_folder: str) -> str:
+    return os.path.join(cache_folder, prompt_hash[:16], f"{content_hash}.json")
+
+
+def load_cached_summary(content_hash: str, prompt_hash: str, cache_folder: str = GPT_CACHE_FOLDER):
+    """
+    (본문 해시, 프롬프트 해시)에 해당하는 요약 캐시를 반환합니다. 없으면 None.
+    """
+    try:
+        with open(_cache_path(content_hash, prompt_hash, cache_folder), "r", encoding="utf-8") as f:
+            return json.load(f).get("summary")
+    except (OSError, ValueError):
+        return None
+
+
+def save_cached_summary(content_hash: str, prompt_hash: str, summary: str, cache_folder: str = GPT_CACHE_FOLDER):
+    """
+    요약 결과를 디스크 캐시에 저장합니다. 임시 파일에 쓴 뒤 교체하므로 동시에 써도 깨지지 않습니다.
+    """
+    file_path = _cache_path(content_hash, prompt_hash, cache_folder)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    tmp_path = f"{file_path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"summary": summary}, f, ensure_ascii=False)
+    os.replace(tmp_path, file_path)
+
+
+def _build_messages(texts, gpt_prompt):
+    items = [{"id": i, "text": text} for i, text in enumerate(texts)]
+    instruction = (
+        "아래 JSON 배열의 각 항목(text)을 지시에 따라 요약하세요. "
+        '반드시 {"summaries": [{"id": 번호, "summary": "요약"}]} 형식의 JSON 으로만 답하세요.\n\n'
+        + json.dumps(items, ensure_ascii=False)
+    )
+    return [
+        {"role": "system", "content": gpt_prompt},
+        {"role": "user", "content": instruction},
+    ]
+
+
+def request_batch_summary(texts, gpt_prompt, api_key, base_url=GPT_BASE_URL, model=GPT_MODEL, timeout=GPT_TIMEOUT):
+    """
+    여러 항목을 한 번의 chat completion 요청으로 요약합니다.
+    반환값: {배치 내 순번: 요약} 딕셔너리 (응답에서 빠진 항목은 포함되지 않음)
+    """
+    response = requests.post(
+        f"{base_url.rstrip('/')}/chat/completions",
+        headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+        json={
+            "model": model,
+            "messages": _build_messages(texts, gpt_prompt),
+            "response_format": {"type": "json_object"},
+        },
+        timeout=timeout,
+    )
+    response.raise_for_status()
+    content = response.json()["choices"][0]["message"]["content"]
+    summaries = {}
+    for item in json.loads(content).get("summaries", []):
+        try:
+            index = int(item["id"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if 0 <= index < len(texts) and item.get("summary"):
+            summaries[index] = str(item["summary"]).strip()
+    return summaries
+
+
+def summarize_texts(texts, gpt_prompt, api_key, base_url=GPT_BASE_URL, model=GPT_MODEL,
+                    batch_size=GPT_BATCH_SIZE, max_workers=GPT_MAX_WORKERS, timeout=GPT_TIMEOUT,
+                    deadline=GPT_DEADLINE, cache_folder=GPT_CACHE_FOLDER, limiter=None):
+    """
+    요약문 목록을 GPT로 일괄 요약합니다.
+    - 캐시에 있는 항목은 요청하지 않습니다.
+    - 남은 항목은 batch_size 개씩 묶어 max_workers 개까지 동시에 요청합니다.
+    - 실패하거나 제한 시간을 넘긴 항목은 원래(정리된) 요약을 그대로 사용합니다.
+    """
+    results = list(texts)
+    limiter = limiter or rate_limiter
+    prompt_hash = _hash_text(gpt_prompt)
+
+    # 캐시 조회 및 중복 본문 제거
+    pending = {}  # content_hash -> (text, [결과 인덱스])
+    for i, text in enumerate(texts):
+        if not text:
+            continue
+        content_hash = _hash_text(text)
+        if content_hash in pending:
+            pending[content_hash][1].append(i)
+            continue
+        cached = load_cached_summary(content_hash, prompt_hash, cache_folder)
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending[content_hash] = (text, [i])
+
+    if not pending:
+        return results
+
+    hashes = list(pending.keys())
+    batches = [hashes[i:i + batch_size] for i in range(0, len(hashes), batch_size)]
+    end_at = time.monotonic() + deadline
+
+    def run_batch(batch_hashes):
+        batch_texts = [pending[h][0] for h in batch_hashes]
+        tokens = sum(_estimate_tokens(t) for t in batch_texts) * 2  # 입력 + 출력
+        if not limiter.acquire(tokens, end_at):
+            return {}
+        request_timeout = max(1.0, min(timeout, end_at - time.monotonic()))
+        summaries = request_batch_summary(batch_texts, gpt_prompt, api_key, base_url, model, request_timeout)
+        return {batch_hashes[index]: summary for index, summary in summaries.items()}
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = [executor.submit(run_batch, batch) for batch in batches]
+        done, not_done = wait(futures, timeout=max(0.0, end_at - time.monotonic()))
+        if not_done:
+            print(f"GPT 요약 제한 시간 초과: {len(not_done)}개 배치는 기존 요약을 사용합니다.")
+        for future in done:
+            try:
+                batch_result = future.result()
+            except Exception as e:
+                print(f"GPT 요약 요청 중 오류 발생: {e}")
+                continue
+            for content_hash, summary in batch_result.items():
+                save_cached_summary(content_hash, prompt_hash, summary, cache_folder)
+                for i in pending[content_hash][1]:
+                    results[i] = summary
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results
@@ -0,0 +1,133 @@
+import re
+from collections import deque
+
+import pandas as pd
+
+# ----- 설정별 키워드/부서 라우팅 -----
+# 모든 설정의 키워드를 하나의 Aho-Corasick 오토마톤으로 묶어, 항목마다 제목+요약을 한 번만 훑고
+# 일치하는 설정을 모두 찾습니다. 비용은 (항목 수 × 설정 수 × 키워드 수)가 아니라 본문 길이 + 일치 수에 비례합니다.
+INCLUDE = 0
+EXCLUDE = 1
+
+
+def normalize_text(text: str) -> str:
+    """
+    대소문자와 띄어쓰기 차이를 무시하도록 소문자로 바꾸고 공백을 제거합니다. ("탄소 중립" == "탄소중립")
+    """
+    return re.sub(r"\s+", "", (text or "").lower())
+
+
+def parse_keywords(text) -> list:
+    """
+    쉼표/줄바꿈으로 구분한 입력(또는 목록)을 중복 없는 키워드 목록으로 만듭니다.
+    """
+    if isinstance(text, (list, tuple)):
+        items = text
+    else:
+        items = re.split(r"[,\n]", text or "")
+    keywords = []
+    for item in items:
+        keyword = str(item).strip()
+        if keyword and keyword not in keywords:
+            keywords.append(keyword)
+    return keywords
+
+
+class AhoCorasick:
+    """
+    여러 키워드를 한 번에 찾는 Aho-Corasick 오토마톤입니다. (순수 파이썬)
+    add() 로 키워드마다 값을 붙이고 build() 한 뒤, search() 는 본문에서 일치한 값들을 반환합니다.
+    """
+    def __init__(self):
+        self.goto = [{}]      # 상태별 다음 글자 -> 상태
+        self.fail = [0]       # 실패 시 이동할 상태
+        self.output = [[]]    # 상태에 도달하면 일치하는 값들 (실패 링크의 출력 포함)
+
+    def add(self, keyword: str, value):
+        state = 0
+        for char in normalize_text(keyword):
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = next_state
+        if state:
+            self.output[state].append(value)
+
+    def build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+        return self
+
+    def search(self, text: str) -> set:
+        matches = set()
+        state = 0
+        for char in normalize_text(text):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            if self.output[state]:
+                matches.update(self.output[state])
+        return matches
+
+
+class KeywordRouter:
+    """
+    설정별 포함/제외 키워드와 부서 목록으로 항목을 설정에 배정합니다.
+    - include_keywords: 하나라도 제목/요약에 있으면 포함 (비어 있으면 모든 항목)
+    - exclude_keywords: 하나라도 있으면 제외
+    - departments: 이 부서의 항목만 (비어 있으면 모든 부서)
+    """
+    def __init__(self, settings):
+        self.names = [setting.get("setting_name", "") for setting in settings]
+        self.departments = [set(setting.get("departments") or []) for setting in settings]
+        self.automaton = AhoCorasick()
+        self.open_settings = []   # 포함 키워드가 없어 모든 항목을 받는 설정
+        for index, setting in enumerate(settings):
+            include_keywords = parse_keywords(setting.get("include_keywords"))
+            for keyword in include_keywords:
+                self.automaton.add(keyword, (index, INCLUDE))
+            for keyword in parse_keywords(setting.get("exclude_keywords")):
+                self.automaton.add(keyword, (index, EXCLUDE))
+            if not include_keywords:
+                self.open_settings.append(index)
+        self.automaton.build()
+
+    def route(self, title: str, summary: str, department: str) -> list:
+        """
+        항목 하나가 배정되는 설정 인덱스 목록을 반환합니다.
+        """
+        # 공백을 지우므로 제목 끝과 요약 앞이 이어져 잘못 일치하지 않게 구분 문자를 넣음
+        matches = self.automaton.search(f"{title or ''}\0{summary or ''}")
+        included = {index for index, kind in matches if kind == INCLUDE}
+        excluded = {index for index, kind in matches if kind == EXCLUDE}
+        candidates = included.union(self.open_settings)
+        return [
+            index for index in sorted(candidates)
+            if index not in excluded and (not self.departments[index] or department in self.departments[index])
+        ]
+
+
+def route_entries(rss_df, settings) -> dict:
+    """
+    수집한 항목을 설정별로 나눕니다. 반환값: {setting_name: 해당 설정에 배정된 DataFrame}
+    """
+    router = KeywordRouter(settings)
+    if rss_df is None or rss_df.empty:
+        return {name: pd.DataFrame() for name in router.names}
+    positions = {name: [] for name in router.names}
+    for position, row in enumerate(rss_df[['department', 'title', 'summary']].itertuples(index=False)):
+        for index in router.route(row.title, row.summary, row.department):
+            positions[router.names[index]].append(position)
+    return {name: rss_df.iloc[rows] for name, rows in positions.items()}
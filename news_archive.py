@@ -0,0 +1,141 @@
+import re
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+from feed_store import ENTRY_COLUMNS, FEED_STORE_DB_PATH, _connect
+
+# ----- 보도자료 검색 아카이브 -----
+# 수집한 항목은 feed_store.db 에 계속 쌓이고, entries_fts(FTS5) 색인으로 제목/요약을 검색합니다.
+SEARCH_PAGE_SIZE = 20
+TITLE_WEIGHT = 5.0      # bm25 순위에서 제목 일치를 요약 일치보다 중요하게 봄
+SUMMARY_WEIGHT = 1.0
+SNIPPET_TOKENS = 16
+
+
+def build_match_query(text: str) -> str:
+    """
+    검색어를 FTS5 MATCH 식으로 바꿉니다.
+    한국어는 조사가 붙어 색인되므로("탄소중립을") 단어마다 접두어 검색으로 찾고, 모든 단어가 있어야 일치합니다.
+    "-단어" 는 제외 검색입니다.
+    """
+    included, excluded = [], []
+    for term in re.findall(r"-?[^\s\"]+", text or ""):
+        negative = term.startswith("-")
+        # FTS5 문법 문자는 검색어에서 제외하고 따옴표로 감쌈
+        word = re.sub(r"[^\w]+", "", term)
+        if not word:
+            continue
+        (excluded if negative else included).append(f'"{word}"*')
+    if not included:
+        return ""
+    query = " AND ".join(included)
+    for term in excluded:
+        query += f" NOT {term}"
+    return query
+
+
+def _kst_iso(value):
+    return pd.Timestamp(value).tz_convert(ZoneInfo("Asia/Seoul")).isoformat()
+
+
+def _filters(match_query, start=None, end=None, departments=None):
+    """
+    검색 조건의 FROM/WHERE 절과 인자를 만듭니다. start 이상, end 미만의 발행 시각을 찾습니다.
+    """
+    if match_query:
+        sql = "FROM entries_fts JOIN entries ON entries.rowid = entries_fts.rowid WHERE entries_fts MATCH ?"
+        params = [match_query]
+    else:
+        sql = "FROM entries WHERE 1 = 1"
+        params = []
+    if start is not None:
+        sql += " AND entries.published >= ?"
+        params.append(_kst_iso(start))
+    if end is not None:
+        sql += " AND entries.published < ?"
+        params.append(_kst_iso(end))
+    if departments:
+        sql += f" AND entries.department IN ({', '.join('?' * len(departments))})"
+        params.extend(departments)
+    return sql, params
+
+
+def _to_df(rows, columns):
+    df = pd.DataFrame(rows, columns=columns)
+    if not df.empty:
+        df['published'] = pd.to_datetime(df['published'], utc=True).dt.tz_convert(ZoneInfo("Asia/Seoul"))
+    return df
+
+
+def search_archive(text: str = "", start=None, end=None, departments=None, page: int = 0,
+                   page_size: int = SEARCH_PAGE_SIZE, db_path: str = FEED_STORE_DB_PATH):
+    """
+    아카이브를 검색합니다. 검색어가 있으면 관련도(bm25) 순, 없으면 최신순입니다.
+    반환값: (결과 DataFrame(department, title, link, published, summary, snippet), 전체 결과 수)
+    """
+    match_query = build_match_query(text)
+    sql, params = _filters(match_query, start, end, departments)
+    columns = [f"entries.{column}" for column in ENTRY_COLUMNS]
+    if match_query:
+        columns.append(f"snippet(entries_fts, -1, '**', '**', '…', {SNIPPET_TOKENS})")
+        order = f"bm25(entries_fts, {TITLE_WEIGHT}, {SUMMARY_WEIGHT}), entries.published DESC"
+    else:
+        columns.append("''")
+        order = "entries.published DESC"
+
+    conn = _connect(db_path)
+    try:
+        total = conn.execute(f"SELECT COUNT(*) {sql}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT {', '.join(columns)} {sql} ORDER BY {order} LIMIT ? OFFSET ?",
+            params + [page_size, page * page_size],
+        ).fetchall()
+    finally:
+        conn.close()
+    return _to_df(rows, ENTRY_COLUMNS + ['snippet']), total
+
+
+def archive_facets(text: str = "", start=None, end=None, departments=None, db_path: str = FEED_STORE_DB_PATH) -> dict:
+    """
+    검색 결과의 부서별/월별 건수를 반환합니다. 형식: {"departments": {부서: 건수}, "months": {"YYYY-MM": 건수}}
+    부서 건수는 부서 선택과 무관하게 세어 다른 부서로 바꿀 때의 결과 수를 보여줍니다.
+    """
+    match_query = build_match_query(text)
+    conn = _connect(db_path)
+    try:
+        sql, params = _filters(match_query, start, end)
+        by_department = conn.execute(
+            f"SELECT entries.department, COUNT(*) {sql} GROUP BY entries.department ORDER BY COUNT(*) DESC", params
+        ).fetchall()
+        sql, params = _filters(match_query, start, end, departments)
+        by_month = conn.execute(
+            f"SELECT substr(entries.published, 1, 7) AS month, COUNT(*) {sql} GROUP BY month ORDER BY month DESC", params
+        ).fetchall()
+    finally:
+        conn.close()
+    return {"departments": dict(by_department), "months": dict(by_month)}
+
+
+def load_archive_entries(start, end, departments=None, text: str = "", db_path: str = FEED_STORE_DB_PATH):
+    """
+    기간(start 이상, end 미만)의 항목을 발행순으로 반환합니다. 네트워크 없이 지난 다이제스트를 다시 만들 때 씁니다.
+    """
+    sql, params = _filters(build_match_query(text), start, end, departments)
+    conn = _connect(db_path)
+    try:
+        rows = conn.execute(
+            f"SELECT {', '.join(f'entries.{column}' for column in ENTRY_COLUMNS)} {sql} ORDER BY entries.published",
+            params,
+        ).fetchall()
+    finally:
+        conn.close()
+    return _to_df(rows, ENTRY_COLUMNS)
+
+
+def archive_departments(db_path: str = FEED_STORE_DB_PATH) -> list:
+    conn = _connect(db_path)
+    try:
+        return [row[0] for row in conn.execute("SELECT DISTINCT department FROM entries ORDER BY department")]
+    finally:
+        conn.close()
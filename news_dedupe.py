@@ -0,0 +1,270 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+from cluster import SQLITE_JOURNAL_MODE
+
+# ----- 중복 탐지 설정 -----
+DEDUPE_DB_PATH = os.environ.get("DEDUPE_DB_PATH", "dedupe_index.db")
+LEGACY_INDEX_PATH = "dedupe_index.json"    # 예전 JSON 인덱스 (처음 한 번 옮겨옴)
+SIMHASH_BITS = 64
+LSH_BANDS = 4             # 64비트를 16비트씩 4개 밴드로 나눔
+HAMMING_THRESHOLD = 3     # 밴드 수보다 작아야 후보 누락이 없음 (비둘기집 원리)
+SHINGLE_SIZE = 3          # 한국어는 어절보다 글자 3-gram 이 안정적
+RETENTION_DAYS = 30       # 인덱스에 보관하는 기간
+
+_band_bits = SIMHASH_BITS // LSH_BANDS
+_band_mask = (1 << _band_bits) - 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    link TEXT PRIMARY KEY,
+    fp TEXT NOT NULL,
+    grp TEXT NOT NULL,
+    seen TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fingerprints_seen ON fingerprints (seen);
+CREATE TABLE IF NOT EXISTS fingerprint_bands (
+    band TEXT NOT NULL,
+    link TEXT NOT NULL,
+    PRIMARY KEY (band, link)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS fingerprint_bands_link ON fingerprint_bands (link);
+"""
+
+# 여러 설정을 동시에 발송해도 새 항목의 그룹을 정하고 저장하는 과정이 겹치지 않도록
+# 프로세스 안에서는 이 잠금으로, 프로세스 사이에서는 SQLite 쓰기 트랜잭션(BEGIN IMMEDIATE)으로 순서를 정함
+_lock = threading.Lock()
+
+
+def _connect(db_path: str = DEDUPE_DB_PATH):
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _migrate(conn, path: str = LEGACY_INDEX_PATH):
+    """
+    예전 JSON 인덱스가 있고 테이블이 비어 있으면 한 번 옮겨오고(그룹 ID 유지),
+    밴드 테이블이 비어 있으면 저장된 지문으로 채웁니다.
+    """
+    if os.path.exists(path) and not conn.execute("SELECT 1 FROM fingerprints LIMIT 1").fetchone():
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entries = json.load(f).get("entries", {})
+            conn.executemany(
+                "INSERT OR IGNORE INTO fingerprints (link, fp, grp, seen) VALUES (?, ?, ?, ?)",
+                [(link, entry["fp"], entry["group"], entry["seen"]) for link, entry in entries.items()],
+            )
+        except (OSError, ValueError, KeyError) as e:
+            print(f"예전 중복 탐지 인덱스를 옮기는 중 오류 발생: {e}")
+    if not conn.execute("SELECT 1 FROM fingerprint_bands LIMIT 1").fetchone():
+        conn.executemany(
+            "INSERT OR IGNORE INTO fingerprint_bands (band, link) VALUES (?, ?)",
+            [(band, link) for link, fp in conn.execute("SELECT link, fp FROM fingerprints").fetchall()
+             for band in _bands(int(fp, 16))],
+        )
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"[\W_]+", "", (text or "").lower())
+
+
+def simhash(text: str) -> int:
+    """
+    글자 shingle 기반 64비트 SimHash 지문을 계산합니다.
+    """
+    normalized = _normalize(text)
+    if len(normalized) < SHINGLE_SIZE:
+        shingles = Counter([normalized])
+    else:
+        shingles = Counter(normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1))
+
+    weights = [0] * SIMHASH_BITS
+    for shingle, count in shingles.items():
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += count if (h >> bit) & 1 else -count
+
+    fingerprint = 0
+    for bit in range(SIMHASH_BITS):
+        if weights[bit] > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def _bands(fingerprint: int):
+    return [f"{i}:{(fingerprint >> (i * _band_bits)) & _band_mask:x}" for i in range(LSH_BANDS)]
+
+
+class SimHashIndex:
+    """
+    SimHash 지문을 밴드별 버킷(SQLite 색인 테이블)에 보관하는 LSH 인덱스입니다.
+    조회할 때는 같은 버킷에 든 후보만 읽으므로 인덱스가 커져도 전체를 읽지 않습니다.
+    이번 호출에서 새로 넣은 항목은 save() 전까지 메모리에만 둡니다. (conn 이 None 이면 메모리만 사용)
+    """
+    def __init__(self, conn=None):
+        self.conn = conn
+        self.new_entries = {}              # link -> {"fp", "group"}
+        self.new_buckets = defaultdict(set)
+        self.touched = set()
+
+    def get(self, link: str):
+        if link in self.new_entries:
+            return self.new_entries[link]
+        if self.conn is None:
+            return None
+        row = self.conn.execute("SELECT fp, grp FROM fingerprints WHERE link = ?", (link,)).fetchone()
+        return {"fp": int(row[0], 16), "group": row[1]} if row else None
+
+    def add(self, link: str, fingerprint: int, group: str):
+        self.new_entries[link] = {"fp": fingerprint, "group": group}
+        for band in _bands(fingerprint):
+            self.new_buckets[band].add(link)
+
+    def touch(self, link: str):
+        self.touched.add(link)
+
+    def nearest_group(self, fingerprint: int, threshold: int = HAMMING_THRESHOLD):
+        """
+        해밍 거리가 threshold 이하인 가장 가까운 항목의 그룹 ID 를 반환합니다. 없으면 None.
+        """
+        bands = _bands(fingerprint)
+        candidates = {}
+        if self.conn is not None:
+            rows = self.conn.execute(
+                "SELECT f.link, f.fp, f.grp FROM fingerprint_bands b JOIN fingerprints f ON f.link = b.link "
+                f"WHERE b.band IN ({', '.join('?' * len(bands))})",
+                bands,
+            )
+            for link, fp, group in rows:
+                candidates[link] = (int(fp, 16), group)
+        for band in bands:
+            for link in self.new_buckets.get(band, ()):
+                candidates[link] = (self.new_entries[link]["fp"], self.new_entries[link]["group"])
+
+        best_group, best_distance = None, threshold + 1
+        for fp, group in candidates.values():
+            distance = bin(fp ^ fingerprint).count("1")
+            if distance < best_distance:
+                best_group, best_distance = group, distance
+        return best_group
+
+    def save(self, seen: str):
+        """
+        새 항목과 밴드를 저장하고, 다시 본 항목의 seen 을 갱신한 뒤 보관 기간이 지난 항목을 지웁니다.
+        """
+        cutoff = (datetime.now() - timedelta(days=RETENTION_DAYS)).strftime("%Y-%m-%d")
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO fingerprints (link, fp, grp, seen) VALUES (?, ?, ?, ?)",
+            [(link, f"{entry['fp']:016x}", entry["group"], seen) for link, entry in self.new_entries.items()],
+        )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO fingerprint_bands (band, link) VALUES (?, ?)",
+            [(band, link) for link, entry in self.new_entries.items() for band in _bands(entry["fp"])],
+        )
+        self.conn.executemany("UPDATE fingerprints SET seen = ? WHERE link = ?", [(seen, link) for link in self.touched])
+        self.conn.execute(
+            "DELETE FROM fingerprint_bands WHERE link IN (SELECT link FROM fingerprints WHERE seen < ?)", (cutoff,)
+        )
+        self.conn.execute("DELETE FROM fingerprints WHERE seen < ?", (cutoff,))
+
+
+def _known_links(conn, links) -> set:
+    known = set()
+    links = list(dict.fromkeys(links))
+    for start in range(0, len(links), 500):
+        chunk = links[start:start + 500]
+        rows = conn.execute(f"SELECT link FROM fingerprints WHERE link IN ({', '.join('?' * len(chunk))})", chunk)
+        known.update(row[0] for row in rows)
+    return known
+
+
+def _assign_groups(conn, rows, today: str, persist: bool) -> list:
+    """
+    행마다 그룹 ID 를 정합니다. 이미 본 link 는 저장된 그룹을, 새 link 는 가장 가까운 항목의 그룹(없으면 자기 link)을 씁니다.
+    """
+    # 지문 계산은 시간이 걸리므로 잠금 밖에서 새 link 만 미리 계산
+    known = _known_links(conn, [row.link for row in rows]) if conn is not None else set()
+    fingerprints = {row.link: simhash(f"{row.title} {row.summary}") for row in rows if row.link not in known}
+
+    with _lock:
+        if persist:
+            conn.execute("BEGIN IMMEDIATE")
+        try:
+            if persist:
+                _migrate(conn)
+            index = SimHashIndex(conn)
+            groups = []
+            for row in rows:
+                entry = index.get(row.link)
+                if entry is not None:
+                    group = entry["group"]
+                    index.touch(row.link)
+                else:
+                    fingerprint = fingerprints.get(row.link)
+                    if fingerprint is None:
+                        fingerprint = simhash(f"{row.title} {row.summary}")
+                    group = index.nearest_group(fingerprint) or row.link
+                    index.add(row.link, fingerprint, group)
+                groups.append(group)
+            if persist:
+                index.save(today)
+                conn.execute("COMMIT")
+        except BaseException:
+            if persist and conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+    return groups
+
+
+def assign_dedupe_groups(df, db_path: str = DEDUPE_DB_PATH, persist: bool = True):
+    """
+    제목+요약이 거의 같은 항목끼리 같은 값을 갖는 'dedupe_group' 열을 붙여 반환합니다. (행은 그대로)
+    여러 설정에 나눠 보내기 전에 한 번만 부르고, 설정별로는 collapse_duplicates 로 합칩니다.
+    persist=False 이면 인덱스를 읽기만 하고 저장하지 않습니다. (지난 자료로 다시 만들 때 발송 상태를 바꾸지 않도록)
+    """
+    if df is None or df.empty:
+        return df
+
+    today = datetime.now().strftime("%Y-%m-%d")
+    rows = list(df[['link', 'title', 'summary']].itertuples(index=False))
+    groups = None
+    try:
+        conn = _connect(db_path)
+        try:
+            groups = _assign_groups(conn, rows, today, persist)
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"중복 탐지 인덱스 처리 중 오류 발생: {e}")
+    if groups is None:
+        # 인덱스를 쓸 수 없으면 이번 항목끼리만 비교
+        groups = _assign_groups(None, rows, today, False)
+    return df.assign(dedupe_group=groups)
+
+
+def collapse_duplicates(df):
+    """
+    같은 dedupe_group 의 행을 하나로 합칩니다.
+    남는 항목은 처음 등장한 행이며, 'departments' 열에 발표한 모든 부서를 담습니다.
+    """
+    if df is None or df.empty or 'dedupe_group' not in df:
+        return df
+    departments = df.groupby('dedupe_group', sort=False)['department'].agg(lambda s: list(dict.fromkeys(s)))
+    deduped = df.drop_duplicates('dedupe_group', keep='first').copy()
+    deduped['departments'] = deduped['dedupe_group'].map(departments)
+    return deduped.drop(columns=['dedupe_group'])
+
+
+def dedupe_entries(df, db_path: str = DEDUPE_DB_PATH, persist: bool = True):
+    """
+    제목+요약이 거의 같은 항목을 하나로 합칩니다. (assign_dedupe_groups + collapse_duplicates)
+    """
+    return collapse_duplicates(assign_dedupe_groups(df, db_path, persist))
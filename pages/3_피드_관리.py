@@ -0,0 +1,93 @@
+import streamlit as st
+import pandas as pd
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from feed_registry import load_feeds, save_feeds, normalize_feed, validate_feeds, FEED_FIELDS
+from feed_store import load_poll_states
+from feed_fetcher import circuit_open
+
+st.title("RSS 피드 관리")
+st.caption("수집할 피드를 추가/수정합니다. 수집 주기는 피드별 발행 빈도에 맞춰 자동으로 조정됩니다.")
+
+
+# ----- 표시용 함수 -----
+def format_timestamp(value):
+    if not value:
+        return "-"
+    return datetime.fromtimestamp(value, ZoneInfo("Asia/Seoul")).strftime("%m-%d %H:%M")
+
+
+def health_label(state):
+    """
+    서킷 브레이커 상태를 표시용 문자열로 만듭니다.
+    """
+    if circuit_open(state, time.time()):
+        return f"⛔ 차단 (~{format_timestamp(state['circuit_open_until'])})"
+    if state.get("failures"):
+        return f"⚠️ 연속 실패 {state['failures']}회"
+    return "정상" if state else "-"
+
+
+def build_status_df(feeds, states):
+    """
+    피드별 수집 상태(주기, 발행률, 마지막/다음 수집 시각, 응답 시간, 오류율, 차단 여부)를 표로 만듭니다.
+    """
+    rows = []
+    for feed in feeds:
+        state = states.get(feed["name"], {})
+        rate = state.get("publish_rate")
+        interval = state.get("poll_interval")
+        rows.append({
+            "이름": feed["name"],
+            "사용": "✅" if feed["enabled"] else "⏸️",
+            "수집 주기(분)": round(interval / 60) if interval else "-",
+            "발행률(건/일)": round(rate * 86400, 1) if rate is not None else "-",
+            "마지막 수집": format_timestamp(state.get("last_polled_at")),
+            "다음 수집": format_timestamp(state.get("next_poll_at")),
+            "응답 시간(초)": round(state["latency_ewma"], 2) if state.get("latency_ewma") is not None else "-",
+            "오류율": f"{state['error_rate']:.0%}" if state.get("error_rate") is not None else "-",
+            "상태": health_label(state),
+        })
+    return pd.DataFrame(rows)
+
+
+# ----- 메인 실행 흐름 -----
+feeds = load_feeds()
+
+st.subheader("피드 목록")
+edited_df = st.data_editor(
+    pd.DataFrame(feeds, columns=FEED_FIELDS),
+    num_rows="dynamic",
+    use_container_width=True,
+    column_config={
+        "name": st.column_config.TextColumn("이름 (부서명)", required=True),
+        "url": st.column_config.TextColumn("RSS URL", required=True),
+        "enabled": st.column_config.CheckboxColumn("사용", default=True),
+        "description": st.column_config.TextColumn("설명"),
+        "min_poll_minutes": st.column_config.NumberColumn("최소 주기(분)", min_value=1),
+        "max_poll_minutes": st.column_config.NumberColumn("최대 주기(분)", min_value=1),
+    },
+    key="feed_editor",
+)
+
+if st.button("저장"):
+    # 빈 칸은 NaN 으로 들어오므로 None 으로 바꿔 저장
+    new_feeds = [
+        {key: (None if pd.isna(value) else value) for key, value in row.items()}
+        for row in edited_df.to_dict("records")
+    ]
+    new_feeds = [normalize_feed(feed) for feed in new_feeds if feed.get("name") or feed.get("url")]
+    try:
+        errors = validate_feeds(new_feeds)
+        if errors:
+            for error in errors:
+                st.error(error)
+        else:
+            save_feeds(new_feeds)
+            st.success(f"피드 {len(new_feeds)}개가 저장되었습니다.")
+    except Exception as e:
+        st.error(f"피드 저장 중 오류 발생: {str(e)}")
+
+st.subheader("수집 상태")
+st.dataframe(build_status_df(feeds, load_poll_states()), use_container_width=True, hide_index=True)
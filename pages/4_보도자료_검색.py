@@ -0,0 +1,70 @@
+import math
+import streamlit as st
+from datetime import datetime, timedelta, time
+from zoneinfo import ZoneInfo
+from news_archive import search_archive, archive_facets, archive_departments, load_archive_entries, SEARCH_PAGE_SIZE
+from news_dedupe import dedupe_entries
+from rss_back_run import generate_markdown
+
+st.title("보도자료 검색")
+st.caption("지금까지 수집한 보도자료를 제목/요약으로 검색합니다. (단어마다 앞부분 일치, '-단어' 는 제외)")
+
+KST = ZoneInfo("Asia/Seoul")
+
+
+# ----- 검색 조건 -----
+def date_range_to_bounds(date_range):
+    """
+    날짜 선택값을 (시작 시각, 다음날 0시) 범위로 바꿉니다.
+    """
+    if not isinstance(date_range, (list, tuple)) or not date_range:
+        return None, None
+    start_date = date_range[0]
+    end_date = date_range[-1]
+    start = datetime.combine(start_date, time(0, 0), tzinfo=KST)
+    end = datetime.combine(end_date + timedelta(days=1), time(0, 0), tzinfo=KST)
+    return start, end
+
+
+today = datetime.now(KST).date()
+query = st.text_input("검색어", key="archive_query")
+col1, col2 = st.columns(2)
+with col1:
+    date_range = st.date_input("기간", value=(today - timedelta(days=30), today), key="archive_dates")
+with col2:
+    departments = st.multiselect("부서", archive_departments(), key="archive_departments")
+start, end = date_range_to_bounds(date_range)
+
+# ----- 검색 결과 -----
+facets = archive_facets(query, start, end, departments)
+with st.sidebar:
+    st.subheader("부서별 건수")
+    for dept, count in facets["departments"].items():
+        st.write(f"{dept}: {count}")
+    st.subheader("월별 건수")
+    for month, count in facets["months"].items():
+        st.write(f"{month}: {count}")
+
+page_count = max(1, math.ceil(sum(facets["months"].values()) / SEARCH_PAGE_SIZE))
+page = st.number_input("페이지", min_value=1, max_value=page_count, value=1, step=1, key="archive_page")
+results_df, total = search_archive(query, start, end, departments, page=page - 1)
+st.write(f"검색 결과 {total}건 (페이지 {page}/{page_count})")
+
+for row in results_df.itertuples(index=False):
+    st.markdown(f"**{row.title}** [[링크]]({row.link})  \n"
+                f"<sub>{row.department} · {row.published.strftime('%Y-%m-%d %H:%M')}</sub>", unsafe_allow_html=True)
+    st.markdown(row.snippet or row.summary[:200])
+
+# ----- 지난 다이제스트 다시 만들기 -----
+st.subheader("지난 다이제스트 다시 만들기")
+st.caption("선택한 기간/부서(와 검색어)의 보도자료로 다이제스트를 다시 만듭니다. 저장된 데이터만 사용합니다.")
+if st.button("다이제스트 만들기") and start is not None:
+    # 지난 자료로 다시 만드는 것이므로 발송에 쓰는 중복 탐지 인덱스는 바꾸지 않음
+    digest_df = dedupe_entries(load_archive_entries(start, end, departments, query), persist=False)
+    if digest_df.empty:
+        st.warning("해당 기간의 보도자료가 없습니다.")
+    else:
+        markdown_output = generate_markdown(digest_df, start, end - timedelta(days=1))
+        st.text_area("생성된 마크다운", markdown_output, height=300)
+        st.download_button("마크다운 내려받기", markdown_output,
+                           file_name=f"digest_{start.strftime('%y%m%d')}_{(end - timedelta(days=1)).strftime('%y%m%d')}.md")
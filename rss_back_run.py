@@ -1,30 +1,43 @@
-import pandas as pd
-from datetime import datetime, timedelta, time
+from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 from holidayskr import is_holiday
-import feedparser
-import requests
-from collections import defaultdict
-from bs4 import BeautifulSoup
-import html
 import json
 import os
 import glob
+import argparse
+import socket
 import streamlit as st
 from dooray_api_client import DoorayAPIClient
+from feed_fetcher import load_feed_window, stale_feeds, poll_due_feeds
+from gpt_summarizer import summarize_texts
+from digest_templates import render_digest, DEFAULT_TEMPLATE
+from news_dedupe import assign_dedupe_groups, collapse_duplicates
+from keyword_router import route_entries
+from enclosure_mirror import mirror_enclosures, ByteBudget, DEFAULT_MAX_FILE_BYTES
+from delivery_ledger import (upsert_wiki_page, deliver_increment, delivered_links, get_delivery, UPSERT_MESSAGES,
+                             INTRADAY_MODES, DEFAULT_INTRADAY_INTERVAL_MINUTES)
+from digest_pagination import split_digest, DEFAULT_MAX_PAGE_BYTES, DEFAULT_MAX_PAGE_ITEMS
+from setting_schedule import (get_schedule, group_by_slot, dispatch_offset, parse_cutoff, DEFAULT_CUTOFF,
+                              DISPATCH_JITTER_SECONDS, MAX_CONCURRENT_DISPATCH)
+from digest_archive import archive_digest, build_rollup, render_rollup, rollup_period
+from delivery_outbox import enqueue_delivery, deliver_outbox_item, drain_outbox, outbox_status
+from singleflight import singleflight_stats
+from cluster import (acquire_lease, release_lease, default_worker_id, heartbeat, owned_settings, remove_worker,
+                     HEARTBEAT_INTERVAL_SECONDS)
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from concurrent.futures import ThreadPoolExecutor
 import time as time_module
 
-# RSS URL 딕셔너리
-rss_url_dict = {
-    '금융위원회':'https://www.korea.kr/rss/dept_fsc.xml',
-    '기획재정부': 'https://www.korea.kr/rss/dept_moef.xml',
-    '산업통상자원부' : 'https://www.korea.kr/rss/dept_motie.xml',
-    '과학기술정보통신부' : 'https://www.korea.kr/rss/dept_msit.xml',
-    '중소벤처기업부' : 'https://www.korea.kr/rss/dept_mss.xml',
-    '탄소중립녹색성장 위원회' : 'https://www.korea.kr/rss/dept_cnc.xml',
-}
+# 워커 모드에서 (설정, 날짜) 처리 잠금 유지 시간
+SETTING_LEASE_SECONDS = 3600
+# 피드 수집 작업 잠금 유지 시간 (수집 주기 1분보다 짧게)
+FEED_POLL_LEASE_SECONDS = 55
+# 프로세스가 꺼져 있던 동안 놓친 일정은 이 시간 안에 재시작하면 한 번만 실행
+MISFIRE_GRACE_SECONDS = 3600
 
 # JSON 설정 파일 로드 함수
 def load_settings(folder="task_list"):
@@ -49,9 +62,10 @@ def load_settings(folder="task_list"):
         print(f"설정 파일 로딩 중 오류 발생: {e}")
         return []
 
-def get_start_date_and_time():
+def get_start_date_and_time(cutoff=DEFAULT_CUTOFF):
     """
     시작 날짜와 시간 계산 함수
+    cutoff("HH:MM"): 직전 영업일의 이 시각 이후 발행된 보도자료부터 수집
     """
     # 'Asia/Seoul' 타임존 정보 사용
     kst = ZoneInfo("Asia/Seoul")
@@ -64,100 +78,73 @@ def get_start_date_and_time():
         start_time = start_time - timedelta(days=1)
     
     start_date = start_time.strftime("%Y-%m-%d")
-    start_date_6pm = datetime.combine(start_time, time(17, 30), tzinfo=kst)
+    start_date_6pm = datetime.combine(start_time, parse_cutoff(cutoff), tzinfo=kst)
     
     return start_date, start_date_6pm, cur_date, start_time
 
-def clean_summary(summary_html):
+def generate_markdown(df, start_time, korea_time, stale=None, attachments=None, template=DEFAULT_TEMPLATE,
+                      department_order=None):
     """
-    HTML 요약 정보를 정리하는 함수
+    수집한 데이터를 마크다운으로 변환하는 함수 (GPT 요약은 발송 전에 한 번만 적용해 넘김)
+    stale({부서: 마지막 수집 성공 시각}): 수집에 실패해 이전 수집분으로 채운 부서 (지연 표시)
+    attachments({link: [{"name", "file_id"}]}): 위키에 올린 첨부파일 (항목 아래에 링크)
+    template / department_order: 설정이 고른 다이제스트 템플릿(templates/*.md.j2)과 부서 순서
     """
-    try:
-        soup = BeautifulSoup(summary_html, 'html5lib')
-
-        # 이미지나 링크 등 불필요한 요소 제거
-        for tag in soup(['a', 'img', 'figure', 'figcaption', 'div']):
-            tag.decompose()
-
-        # 텍스트만 추출 + HTML entity 복호화
-        clean_text = html.unescape(soup.get_text(separator=' ', strip=True))
+    return render_digest(df, start_time, korea_time, stale, attachments, template, department_order)
 
-        # 공백 정리
-        clean_text = ' '.join(clean_text.split())
-
-        return clean_text
-    except Exception as e:
-        print(f"요약 정리 중 오류 발생: {e}")
-        return summary_html
+# ... (생략: 기존 import 및 함수 정의 부분 동일)
 
-def fetch_rss_data(rss_url_dict):
+def get_user_secret(user_name, key):
     """
-    RSS 피드에서 데이터를 가져오는 함수
+    st.secrets에서 user_name과 일치하는 사용자의 값(key)을 반환합니다.
     """
-    all_entries = []
-
-    # RSS 피드를 URL 딕셔너리에서 받아 처리
-    for dept_name, rss_url in rss_url_dict.items():
-        try:
-            feed = feedparser.parse(rss_url)
-            for entry in feed.entries:
-                all_entries.append({
-                    'department': dept_name,
-                    'title': entry.title,
-                    'link': entry.link,
-                    'published': entry.published,
-                    'summary': entry.summary if hasattr(entry, 'summary') else ''
-                })
-        except Exception as e:
-            print(f"{dept_name} RSS 처리 중 오류 발생: {e}")
+    if hasattr(st, "secrets"):
+        for user_info in st.secrets.values():
+            if isinstance(user_info, dict) and user_info.get("name") == user_name:
+                return user_info.get(key)
+    return None
 
-    # DataFrame 생성
-    if not all_entries:
-        return pd.DataFrame()
-        
-    rss_df = pd.DataFrame(all_entries)
-    rss_df['summary'] = rss_df['summary'].apply(clean_summary)
-
-    # 한국 시간대로 변환
-    kst = ZoneInfo("Asia/Seoul")
-    rss_df['published'] = pd.to_datetime(rss_df['published'], utc=True).dt.tz_convert(kst)
-
-    return rss_df
-
-
-def generate_markdown(df, start_time, korea_time, use_gpt=False, gpt_prompt=""):
+def deliver_digest(payload):
     """
-    수집한 데이터를 마크다운으로 변환하는 함수
+    대기열에 저장된 다이제스트를 Dooray Wiki에 upsert 합니다. (토큰은 발송 시점에 조회)
     """
-    markdown_output = f"# {start_time.strftime('%y%m%d')}~{korea_time.strftime('%y%m%d')} 보도자료\n\n"
-
-    grouped = defaultdict(list)
-    for _, row in df.iterrows():
-        grouped[row['department']].append(row)
-
-    for dept, items in grouped.items():
-        markdown_output += f"## {dept}\n"
-        for row in items:
-            pub_time = pd.to_datetime(row['published']).strftime('%Y-%m-%d %H시')
-            markdown_output += f"- **{row['title']}** [[링크]]({row['link']})  \n"
-            markdown_output += f"  <sub>({pub_time})</sub>\n\n"
-            
-            summary = row['summary']
-            if use_gpt and summary and gpt_prompt:
-                #summary = apply_gpt_summary(summary, gpt_prompt)
-                pass
-            if summary:
-                markdown_output += f"  {summary}\n\n"
-            else:
-                markdown_output += f"  요약 정보 없음\n\n"
-                
-    return markdown_output
-
-# ... (생략: 기존 import 및 함수 정의 부분 동일)
-
-def fetch_and_upload_news(setting=None, rss_df=None, progress_bar=None, status=None):
+    dooray_token = get_user_secret(payload["user_name"], "Dooray_token")
+    if not dooray_token:
+        raise Exception(f"'{payload['user_name']}' 사용자의 Dooray 토큰을 찾을 수 없습니다.")
+
+    client = DoorayAPIClient(token=dooray_token)
+    if payload.get("kind") == "increment":
+        # 하루 중 증분 발송: 오늘 페이지에 새 항목만 댓글/본문 덧붙이기로 보냄
+        action, page_id = deliver_increment(
+            client,
+            payload["setting_name"],
+            payload["cur_date"],
+            payload["wiki_id"],
+            payload["mode"],
+            payload["content"],
+            payload["links"]
+        )
+        return UPSERT_MESSAGES[action]
+
+    # 같은 날 재실행 시 중복 페이지를 만들지 않도록 (설정, 날짜) 기준으로 upsert
+    action, page_id = upsert_wiki_page(
+        client,
+        payload["setting_name"],
+        payload["cur_date"],
+        payload["wiki_id"],
+        payload["parent_page_id"],
+        payload["subject"],
+        payload["content"],
+        children=payload["children"],
+        links=payload.get("links")
+    )
+    return UPSERT_MESSAGES[action]
+
+def fetch_and_upload_news(setting=None, rss_df=None, progress_bar=None, status=None, enclosure_budget=None):
     """
     이미 수집된 뉴스 데이터를 받아 Dooray Wiki에 업로드하는 메인 함수
+    enclosure_budget: 여러 설정이 함께 쓰는 첨부파일 다운로드 예산 (없으면 설정마다 기본 예산)
+    반환값: (성공 여부, 결과, 마크다운 여부) - 위키 설정이 없으면 결과는 생성한 마크다운이고, 그 외에는 상태 메시지
     """
     try:
         def update_status(step_num, total_steps, message):
@@ -171,92 +158,433 @@ def fetch_and_upload_news(setting=None, rss_df=None, progress_bar=None, status=N
         
         update_status(cur_steps, total_steps, "날짜 계산 중...")
         cur_steps += 1
-        start_date, start_date_6pm, cur_date, start_time_obj = get_start_date_and_time()
+        start_date, start_date_6pm, cur_date, start_time_obj = get_start_date_and_time(
+            get_schedule(setting)[2] if setting else DEFAULT_CUTOFF
+        )
 
         if rss_df is None or rss_df.empty:
-            return False, "RSS 데이터가 없습니다."
+            return False, "RSS 데이터가 없습니다. (키워드/부서 필터에 맞는 항목 없음)", False
         
         update_status(cur_steps, total_steps, "뉴스 필터링 중...")
         cur_steps += 1
         today_full_news_df = rss_df.query("published >= @start_date_6pm")
+        # 여러 부서가 같이 낸 보도자료는 하나로 합침 (중복 그룹은 보통 부르는 쪽에서 설정 전체에 한 번만 정해 둠)
+        if 'dedupe_group' not in today_full_news_df:
+            today_full_news_df = assign_dedupe_groups(today_full_news_df)
+        today_full_news_df = collapse_duplicates(today_full_news_df)
         
         if today_full_news_df.empty:
-            return False, "필터링 후 뉴스가 없습니다."
+            return False, "필터링 후 뉴스가 없습니다.", False
+
+        # 하루 중 증분 발송: 이미 보낸 항목은 빼고, 오늘 페이지가 있으면 새 항목만 덧붙임
+        intraday_mode = setting.get("intraday_mode") if setting and setting.get("wiki_id") and setting.get("page_id") else None
+        increment_page_id = None
+        if intraday_mode in INTRADAY_MODES:
+            # 오늘 페이지(하위 페이지 포함)를 모두 보낸 뒤부터 증분으로 보냄
+            today_record = get_delivery(setting.get("setting_name"), cur_date) or {}
+            increment_page_id = today_record.get("page_id") if today_record.get("delivered_links") else None
+            delivered = delivered_links(setting.get("setting_name"), cur_date)
+            today_full_news_df = today_full_news_df[~today_full_news_df["link"].isin(delivered)]
+            if today_full_news_df.empty:
+                update_status(total_steps, total_steps, "완료!")
+                return True, "새 보도자료가 없습니다.", False
 
         update_status(cur_steps, total_steps, "마크다운 생성 중...")
         cur_steps += 1
-        markdown_output = generate_markdown(
-            today_full_news_df,
-            start_time_obj,
-            datetime.now(ZoneInfo("Asia/Seoul")),
-            False,
-            ""
-        )
+        use_gpt = bool(setting and setting.get("use_gpt"))
+        gpt_prompt = setting.get("gpt_prompt", "") if use_gpt else ""
+        gpt_key = get_user_secret(setting.get("user_name"), "gpt_key") if use_gpt else None
+        # GPT 요약: 렌더링(분할/페이지별)마다 부르지 않도록 발송할 항목 전체에 한 번만 배치/캐시 처리
+        if use_gpt and gpt_prompt and gpt_key:
+            today_full_news_df = today_full_news_df.assign(
+                summary=summarize_texts(today_full_news_df['summary'].tolist(), gpt_prompt, gpt_key)
+            )
+        korea_time = datetime.now(ZoneInfo("Asia/Seoul"))
+
+        # 수집에 실패한 피드는 저장소에 남은 이전 수집분으로 보내고 지연 표시 (설정이 받는 부서만)
+        stale = stale_feeds()
+        if setting and setting.get("departments"):
+            stale = {dept: at for dept, at in stale.items() if dept in setting["departments"]}
+
+        attachments = {}
+
+        def render(part_df):
+            return generate_markdown(part_df, start_time_obj, korea_time, stale, attachments,
+                                     setting.get("template", DEFAULT_TEMPLATE) if setting else DEFAULT_TEMPLATE,
+                                     setting.get("department_order") if setting else None)
+
+        markdown_output = render(today_full_news_df)
 
         if setting and setting.get("wiki_id") and setting.get("page_id"):
             update_status(cur_steps, total_steps, "Dooray Wiki에 업로드 중...")
             cur_steps += 1
             user_name = setting.get("user_name")
-            dooray_token = None
-
-            if hasattr(st, "secrets"):
-                for user_info in st.secrets.values():
-                    if isinstance(user_info, dict) and user_info.get("name") == user_name:
-                        dooray_token = user_info.get("Dooray_token")
-                        break
+            dooray_token = get_user_secret(user_name, "Dooray_token")
 
             if not dooray_token:
-                return False, f"'{user_name}' 사용자의 Dooray 토큰을 찾을 수 없습니다."
-
-            client = DoorayAPIClient(token=dooray_token)
-            success, page_id = client.create_wiki_page(
-                setting["wiki_id"],
-                setting["page_id"],
-                f"뉴스 업데이트 {cur_date}",
-                markdown_output
-            )
+                return False, f"'{user_name}' 사용자의 Dooray 토큰을 찾을 수 없습니다.", False
+
+            # 첨부파일 미러링 (선택): 내려받은 첨부파일을 위키에 올리고 항목 아래에 링크
+            # (증분은 댓글/덧붙이기라 파일을 첨부할 수 없으므로 올리지 않음)
+            if setting.get("mirror_enclosures") and not increment_page_id:
+                attachments.update(mirror_enclosures(
+                    DoorayAPIClient(token=dooray_token),
+                    setting["wiki_id"],
+                    today_full_news_df,
+                    setting.get("enclosure_max_bytes", DEFAULT_MAX_FILE_BYTES),
+                    enclosure_budget
+                ))
+
+            delivery_key = f"{setting.get('setting_name')}|{cur_date}"
+            if increment_page_id:
+                # 이전 증분이 아직 발송 중이면 겹쳐 보내지 않도록 다음 주기로 미룸
+                if outbox_status(delivery_key) == "sending":
+                    update_status(total_steps, total_steps, "완료!")
+                    return True, "이전 발송이 진행 중이어서 새 보도자료는 다음 주기에 보냅니다.", False
+                # 페이지 제목 줄은 빼고 시각과 건수를 붙임
+                body = render(today_full_news_df)
+                if body.startswith("# "):
+                    body = body.split("\n", 1)[-1].lstrip("\n")
+                page_content = f"### {korea_time.strftime('%H:%M')} 새 보도자료 {len(today_full_news_df)}건\n\n{body}"
+                child_pages = []
+                outbox_id = enqueue_delivery(delivery_key, {
+                    "kind": "increment",
+                    "mode": intraday_mode,
+                    "setting_name": setting.get("setting_name"),
+                    "cur_date": cur_date,
+                    "user_name": user_name,
+                    "wiki_id": setting["wiki_id"],
+                    "content": page_content,
+                    "links": today_full_news_df["link"].tolist()
+                })
+            else:
+                # 너무 큰 다이제스트는 부모(목차) 페이지 + 하위 페이지로 분할
+                subject = f"뉴스 업데이트 {cur_date}"
+                page_content, child_pages = split_digest(
+                    today_full_news_df,
+                    render,
+                    subject,
+                    setting.get("max_page_bytes", DEFAULT_MAX_PAGE_BYTES),
+                    setting.get("max_page_items", DEFAULT_MAX_PAGE_ITEMS)
+                )
+
+                # 렌더링 결과를 대기열에 먼저 저장한 뒤 발송 (실패하면 백그라운드에서 재시도)
+                outbox_id = enqueue_delivery(delivery_key, {
+                    "setting_name": setting.get("setting_name"),
+                    "cur_date": cur_date,
+                    "user_name": user_name,
+                    "wiki_id": setting["wiki_id"],
+                    "parent_page_id": setting["page_id"],
+                    "subject": subject,
+                    "content": page_content,
+                    "children": child_pages,
+                    "links": today_full_news_df["link"].tolist() if intraday_mode in INTRADAY_MODES else None
+                })
+            # 발송한 내용은 날짜별 압축 아카이브에도 보관 (주간/월간 요약에 사용)
+            try:
+                archive_digest(
+                    setting.get("setting_name"),
+                    cur_date,
+                    today_full_news_df,
+                    "\n\n".join([page_content] + [content for _, content in child_pages]),
+                    increment=bool(increment_page_id)
+                )
+            except Exception as e:
+                print(f"다이제스트 보관 중 오류 발생: {e}")
+
+            success, message = deliver_outbox_item(outbox_id, deliver_digest)
 
             update_status(total_steps, total_steps, "완료!")
-            return (True, "업로드 성공") if success else (False, "Dooray 업로드 실패")
+            if success:
+                return True, message, False
+            return False, f"업로드 실패 (대기열에 저장되어 재시도 예정): {message}", False
         else:
             update_status(total_steps, total_steps, "완료!")
-            return True, markdown_output
+            return True, markdown_output, True
 
     except Exception as e:
-        return False, f"오류 발생: {str(e)}"
+        return False, f"오류 발생: {str(e)}", False
+
 
+# 워커 모드(--worker)로 실행하면 설정되는 워커 ID. None 이면 모든 설정을 혼자 처리합니다.
+WORKER_ID = None
+# 설정별 일정 발송 시 분산 범위(초)와 동시 발송 수 (명령행 인자로 변경)
+DISPATCH_JITTER = DISPATCH_JITTER_SECONDS
+MAX_CONCURRENT = MAX_CONCURRENT_DISPATCH
 
-def job():
-    print("\n🕒 작업 시작:", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-    rss_df = fetch_rss_data(rss_url_dict)
+
+def run_settings(settings, jitter_seconds=0, max_concurrent=1):
+    """
+    주어진 설정들의 뉴스를 발송합니다.
+    jitter_seconds 가 있으면 설정별 지연 시간(dispatch_offset)에 맞춰 나눠 보내고,
+    동시에 발송하는 설정은 max_concurrent 개로 제한합니다.
+    """
+    # 설정마다 수집 기준 시각이 다를 수 있으므로 직전 영업일 0시부터 읽어두고 설정별로 다시 거름
+    start_date, start_date_0am, cur_date, start_time_obj = get_start_date_and_time("00:00")
+    # 피드는 백그라운드에서 미리 수집해 두었으므로 저장소에서 읽기만 함 (오래된 피드만 짧게 보충 수집)
+    rss_df = load_feed_window(start_date_0am, WORKER_ID or default_worker_id())
 
     if rss_df.empty:
         print("❌ RSS 데이터가 비어있습니다.")
         return
 
-    for setting in load_settings():
-        print(f"📄 설정 처리 중: {setting.get('setting_name', '이름 없음')}")
-        success, result = fetch_and_upload_news(setting, rss_df=rss_df)
+    if WORKER_ID:
+        total = len(settings)
+        settings = owned_settings(settings, WORKER_ID)
+        print(f"🧩 워커 {WORKER_ID}: 전체 {total}개 설정 중 {len(settings)}개 담당")
+
+    # 중복 그룹은 설정마다 따로 계산하지 않고 한 번만 정함
+    rss_df = assign_dedupe_groups(rss_df)
+    # 모든 설정의 키워드/부서 필터를 한 번에 적용해 설정별 항목을 나눔
+    routed_dfs = route_entries(rss_df, settings)
+    # 첨부파일은 이번 실행 전체에서 정해진 용량까지만 새로 받음 (캐시에 있는 파일은 제외)
+    enclosure_budget = ByteBudget()
+
+    def run_one(setting):
+        setting_name = setting.get('setting_name', '이름 없음')
+        # 재분배 직후 두 워커가 같은 설정을 처리하지 않도록 (설정, 날짜) 단위로 잠금
+        if WORKER_ID and not acquire_lease(f"setting:{setting_name}:{cur_date}", WORKER_ID, SETTING_LEASE_SECONDS):
+            print(f"⏭️ 다른 워커가 처리 중인 설정: {setting_name}")
+            return
+        print(f"📄 설정 처리 중: {setting_name}")
+        success, result, _ = fetch_and_upload_news(setting, rss_df=routed_dfs[setting.get('setting_name', '')],
+                                                    enclosure_budget=enclosure_budget)
         if success:
-            print(f"✅ 업로드 성공: {result}")
+            print(f"✅ 업로드 성공 ({setting_name}): {result}")
         else:
-            print(f"❌ 업로드 실패: {result}")
+            print(f"❌ 업로드 실패 ({setting_name}): {result}")
+
+    started_at = time_module.monotonic()
+    planned = sorted(
+        ((dispatch_offset(s.get('setting_name', ''), jitter_seconds), s) for s in settings),
+        key=lambda item: item[0]
+    )
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrent)) as executor:
+        for offset, setting in planned:
+            delay = started_at + offset - time_module.monotonic()
+            if delay > 0:
+                time_module.sleep(delay)
+            executor.submit(run_one, setting)
+
+
+def run_slot(cron):
+    """
+    같은 cron 일정을 가진 설정들을 발송합니다. (설정별 스케줄러 작업)
+    """
+    print(f"\n🕒 작업 시작 [{cron}]:", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    today = datetime.now(ZoneInfo("Asia/Seoul"))
+    is_business_day = today.weekday() < 5 and not is_holiday(today.strftime("%Y-%m-%d"))
+
+    settings = []
+    for setting in load_settings():
+        setting_cron, business_days_only, cutoff = get_schedule(setting)
+        if setting_cron != cron:
+            continue
+        if business_days_only and not is_business_day:
+            print(f"⏭️ 영업일이 아니어서 건너뜀: {setting.get('setting_name')}")
+            continue
+        settings.append(setting)
+
+    if settings:
+        run_settings(settings, DISPATCH_JITTER, MAX_CONCURRENT)
+
+
+def sync_schedules(scheduler):
+    """
+    설정 파일의 일정과 스케줄러 작업을 맞춥니다.
+    이미 등록된 일정은 건드리지 않으므로 저장된 다음 실행 시각이 유지됩니다.
+    """
+    slots = group_by_slot(load_settings())
+    wanted = {f"slot:{cron}": cron for cron in slots}
+    for job_id, cron in wanted.items():
+        if scheduler.get_job(job_id, jobstore="persistent") is None:
+            try:
+                trigger = CronTrigger.from_crontab(cron, timezone="Asia/Seoul")
+            except ValueError as e:
+                print(f"잘못된 일정({cron}): {e}")
+                continue
+            scheduler.add_job(run_slot, trigger, args=[cron], id=job_id, jobstore="persistent",
+                              coalesce=True, misfire_grace_time=MISFIRE_GRACE_SECONDS)
+            print(f"🗓️ 일정 등록: {cron} ({len(slots[cron])}개 설정)")
+    for scheduled_job in scheduler.get_jobs(jobstore="persistent"):
+        if scheduled_job.id.startswith("slot:") and scheduled_job.id not in wanted:
+            scheduled_job.remove()
+            print(f"🗓️ 일정 제거: {scheduled_job.id[5:]}")
+
+
+def drain_outbox_job():
+    """
+    대기열에 남은(실패했거나 재시작 전에 못 보낸) 다이제스트를 재발송합니다.
+    """
+    sent, failed = drain_outbox(deliver_digest)
+    if sent or failed:
+        print(f"📮 대기열 처리: 성공 {sent}건, 실패 {failed}건")
+
+
+def post_rollups_job(kind):
+    """
+    요약 페이지를 켠 설정마다 지난주(weekly)/지난달(monthly) 요약을 아카이브만으로 만들어 발송합니다.
+    """
+    today = datetime.now(ZoneInfo("Asia/Seoul")).date()
+    start, end, subject = rollup_period(kind, today)
+    settings = [s for s in load_settings() if s.get("post_rollups") and s.get("wiki_id") and s.get("page_id")]
+    if WORKER_ID:
+        settings = owned_settings(settings, WORKER_ID)
+
+    for setting in settings:
+        setting_name = setting.get('setting_name', '')
+        # 발송 기록의 날짜 자리에 기간을 넣어 같은 기간 요약은 페이지 하나만 유지
+        period_key = f"{kind}-{start.isoformat()}"
+        if WORKER_ID and not acquire_lease(f"rollup:{setting_name}:{period_key}", WORKER_ID, SETTING_LEASE_SECONDS):
+            continue
+        rollup = build_rollup(start, end, setting_name)
+        if not rollup["total"]:
+            continue
+        outbox_id = enqueue_delivery(f"{setting_name}|{period_key}", {
+            "setting_name": setting_name,
+            "cur_date": period_key,
+            "user_name": setting.get("user_name"),
+            "wiki_id": setting["wiki_id"],
+            "parent_page_id": setting["page_id"],
+            "subject": subject,
+            "content": render_rollup(rollup, subject),
+            "children": []
+        })
+        success, message = deliver_outbox_item(outbox_id, deliver_digest)
+        print(f"{'✅' if success else '❌'} {subject} ({setting_name}): {message}")
+
+
+# 설정별 마지막 증분 확인 시각 (프로세스 안에서만 유지, 재시작하면 바로 한 번 확인)
+_intraday_checked = {}
+
+
+def intraday_job():
+    """
+    하루 중 증분 발송을 켠 설정 가운데 주기가 된 설정만 새 보도자료를 확인해 보냅니다.
+    오늘 페이지가 없으면 새로 만들고, 있으면 새 항목만 댓글/본문 덧붙이기로 보냅니다.
+    영업일 전용 설정은 정기 발송과 마찬가지로 주말/공휴일에는 건너뜁니다.
+    """
+    now = time_module.time()
+    today = datetime.now(ZoneInfo("Asia/Seoul"))
+    is_business_day = today.weekday() < 5 and not is_holiday(today.strftime("%Y-%m-%d"))
+    settings = [
+        s for s in load_settings()
+        if s.get("intraday_mode") in INTRADAY_MODES and s.get("wiki_id") and s.get("page_id")
+        and (is_business_day or not get_schedule(s)[1])
+        and now - _intraday_checked.get(s.get("setting_name", ""), 0)
+        >= int(s.get("intraday_interval_minutes", DEFAULT_INTRADAY_INTERVAL_MINUTES)) * 60
+    ]
+    if WORKER_ID:
+        settings = owned_settings(settings, WORKER_ID)
+    if not settings:
+        return
+
+    start_date, start_date_0am, cur_date, start_time_obj = get_start_date_and_time("00:00")
+    # 피드는 1분마다 따로 수집하므로 저장소에서 읽기만 함
+    rss_df = load_feed_window(start_date_0am, WORKER_ID or default_worker_id(), catch_up=False)
+    rss_df = assign_dedupe_groups(rss_df)
+    routed_dfs = route_entries(rss_df, settings)
+    enclosure_budget = ByteBudget()
+    for setting in settings:
+        setting_name = setting.get('setting_name', '')
+        _intraday_checked[setting_name] = now
+        lease_name = f"intraday:{setting_name}:{cur_date}"
+        if WORKER_ID and not acquire_lease(lease_name, WORKER_ID, SETTING_LEASE_SECONDS):
+            continue
+        try:
+            success, result, _ = fetch_and_upload_news(setting, rss_df=routed_dfs[setting_name],
+                                                        enclosure_budget=enclosure_budget)
+        finally:
+            if WORKER_ID:
+                release_lease(lease_name, WORKER_ID)
+        if success and result != "새 보도자료가 없습니다.":
+            print(f"🔔 증분 발송 ({setting_name}): {result}")
+        elif not success:
+            print(f"❌ 증분 발송 실패 ({setting_name}): {result}")
+
+
+def poll_feeds_job():
+    """
+    수집 시각이 된 피드만 가져옵니다. (피드별 발행 빈도에 따라 주기가 달라짐)
+    워커가 여러 개여도 한 번에 한 워커만 수집합니다.
+    """
+    owner = WORKER_ID or default_worker_id()
+    if not acquire_lease("feed_poll", owner, FEED_POLL_LEASE_SECONDS):
+        return
+    try:
+        results = poll_due_feeds()
+    finally:
+        release_lease("feed_poll", owner)
+    new_items = {name: count for name, count in results.items() if count}
+    if new_items:
+        print(f"📡 새 보도자료 수집: {new_items}")
+
+
+def log_singleflight_stats():
+    """
+    같은 요청을 합쳐 아낀 횟수를 기록합니다.
+    """
+    for name, stats in singleflight_stats().items():
+        if stats["shared"]:
+            print(f"🔗 요청 합치기 [{name}]: 실제 요청 {stats['calls']}회, 아낀 요청 {stats['shared']}회")
 
 
 # --- APScheduler 설정 ---
 if __name__ == "__main__":
-    scheduler = BackgroundScheduler(timezone="Asia/Seoul")  # ✅ 한국 시간대 지정
+    parser = argparse.ArgumentParser(description="Dooray! Wiki 뉴스 발송 스케줄러")
+    parser.add_argument("--worker", action="store_true", help="여러 프로세스/호스트가 설정을 나눠 처리하는 워커 모드")
+    parser.add_argument("--worker-id", default=None,
+                        help="워커 ID (기본값: 호스트명). 재시작해도 같은 ID 여야 일정 저장소를 이어서 씀. 한 호스트에 여러 워커면 각각 지정")
+    parser.add_argument("--jitter-seconds", type=float, default=DISPATCH_JITTER_SECONDS,
+                        help="같은 시각 설정들을 나눠 보낼 시간 범위(초)")
+    parser.add_argument("--max-concurrent", type=int, default=MAX_CONCURRENT_DISPATCH,
+                        help="동시에 발송하는 설정 수 상한")
+    args = parser.parse_args()
+    DISPATCH_JITTER = args.jitter_seconds
+    MAX_CONCURRENT = args.max_concurrent
+    if args.worker:
+        # 일정 저장소 파일을 워커 ID 로 구분하므로, 재시작 때마다 바뀌는 PID 대신 호스트명을 기본값으로 사용
+        WORKER_ID = args.worker_id or socket.gethostname()
+
+    # 설정별 일정은 SQLite 작업 저장소에 보관해 재시작해도 놓치거나 두 번 실행하지 않음
+    jobstore_path = f"scheduler_jobs_{WORKER_ID}.sqlite" if WORKER_ID else "scheduler_jobs.sqlite"
+    scheduler = BackgroundScheduler(
+        jobstores={
+            "default": MemoryJobStore(),
+            "persistent": SQLAlchemyJobStore(url=f"sqlite:///{jobstore_path}"),
+        },
+        timezone="Asia/Seoul"  # ✅ 한국 시간대 지정
+    )
     print("🔄 스케줄러 초기화됨.")
-    # 매일 오후 5시 (17:00)에 실행
-    trigger = CronTrigger(hour=17, minute=00, timezone="Asia/Seoul" )
-    scheduler.add_job(job, trigger)
+    if WORKER_ID:
+        heartbeat(WORKER_ID)
+        scheduler.add_job(heartbeat, IntervalTrigger(seconds=HEARTBEAT_INTERVAL_SECONDS), args=[WORKER_ID])
+        print(f"🧩 워커 모드: {WORKER_ID}")
+    # 피드는 1분마다 수집 시각이 된 것만 가져옴
+    scheduler.add_job(poll_feeds_job, IntervalTrigger(minutes=1), next_run_time=datetime.now(ZoneInfo("Asia/Seoul")))
+    # 발송 대기열은 1분마다 확인 (시작 직후에도 한 번 실행해 남은 항목부터 이어서 발송)
+    scheduler.add_job(drain_outbox_job, IntervalTrigger(minutes=1), next_run_time=datetime.now(ZoneInfo("Asia/Seoul")))
+
+    # 같은 요청을 합쳐 아낀 횟수는 1시간마다 기록
+    scheduler.add_job(log_singleflight_stats, IntervalTrigger(hours=1))
+    # 하루 중 증분 발송은 1분마다 주기가 된 설정만 확인
+    scheduler.add_job(intraday_job, IntervalTrigger(minutes=1), coalesce=True, max_instances=1)
+
+    # 주간 요약은 월요일, 월간 요약은 매월 1일 아침에 발송
+    scheduler.add_job(post_rollups_job, CronTrigger(day_of_week="mon", hour=8, minute=0, timezone="Asia/Seoul"), args=["weekly"])
+    scheduler.add_job(post_rollups_job, CronTrigger(day=1, hour=8, minute=0, timezone="Asia/Seoul"), args=["monthly"])
 
     scheduler.start()
-    print("✅ 스케줄러 시작됨. 매일 한국시간 오후 5시에 작업이 실행됩니다.")
+    # 설정 파일이 추가/변경되면 1분 안에 일정에 반영
+    sync_schedules(scheduler)
+    scheduler.add_job(sync_schedules, IntervalTrigger(minutes=1), args=[scheduler])
+    print("✅ 스케줄러 시작됨. 설정별 일정(기본: 매일 한국시간 오후 5시)에 작업이 실행됩니다.")
 
     try:
         while True:
             time_module.sleep(0.1)
     except (KeyboardInterrupt, SystemExit):
         print("🛑 종료 중...")
-        scheduler.shutdown()
\ No newline at end of file
+        scheduler.shutdown()
+        if WORKER_ID:
+            remove_worker(WORKER_ID)
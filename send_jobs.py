@@ -0,0 +1,88 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# ----- 백그라운드 발송 작업 -----
+# Streamlit 화면은 작업을 넣고 상태만 확인하므로, 페이지를 옮기거나 닫아도 발송은 계속 진행됩니다.
+SEND_MAX_WORKERS = 4            # 동시에 발송하는 설정 수
+JOB_RETENTION_SECONDS = 3600    # 끝난 작업을 목록에 남겨두는 시간
+
+
+class JobProgress:
+    """
+    fetch_and_upload_news 의 progress_bar / status 자리에 넘기는 진행 상황 기록 객체입니다.
+    (st.progress 의 progress(), st.status 의 update() 와 같은 형태)
+    """
+    def __init__(self, job: dict, lock: threading.Lock):
+        self.job = job
+        self.lock = lock
+
+    def progress(self, value):
+        with self.lock:
+            self.job["progress"] = float(value)
+
+    def update(self, label=None, state=None, **kwargs):
+        with self.lock:
+            if label is not None:
+                self.job["stage"] = label
+
+
+class SendJobs:
+    """
+    프로세스 전체에서 공유하는 발송 작업 실행기입니다. 작업마다 ID 를 붙여 진행 단계와 결과를 기록합니다.
+    """
+    def __init__(self, max_workers: int = SEND_MAX_WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="send")
+        self.lock = threading.Lock()
+        self.jobs = {}
+
+    def submit(self, name: str, func, *args, **kwargs) -> str:
+        """
+        func(*args, progress_bar=..., status=..., **kwargs) 를 백그라운드에서 실행하고 작업 ID 를 반환합니다.
+        func 는 (성공 여부, 결과, 마크다운 여부)를 반환해야 합니다. (결과가 마크다운이 아니면 상태 메시지)
+        """
+        job_id = uuid.uuid4().hex[:8]
+        job = {
+            "id": job_id,
+            "name": name,
+            "state": "queued",
+            "stage": "대기 중...",
+            "progress": 0.0,
+            "result": None,
+            "markdown": False,
+            "submitted_at": time.time(),
+            "finished_at": None,
+        }
+        with self.lock:
+            self._prune()
+            self.jobs[job_id] = job
+        self.executor.submit(self._run, job, func, args, kwargs)
+        return job_id
+
+    def _run(self, job, func, args, kwargs):
+        with self.lock:
+            job["state"] = "running"
+        tracker = JobProgress(job, self.lock)
+        try:
+            success, result, is_markdown = func(*args, progress_bar=tracker, status=tracker, **kwargs)
+        except Exception as e:
+            success, result, is_markdown = False, f"오류 발생: {str(e)}", False
+        with self.lock:
+            job["state"] = "complete" if success else "error"
+            job["result"] = result
+            job["markdown"] = is_markdown
+            job["progress"] = 1.0
+            job["finished_at"] = time.time()
+
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        for job_id in [job_id for job_id, job in self.jobs.items() if job["finished_at"] and job["finished_at"] < cutoff]:
+            del self.jobs[job_id]
+
+    def list_jobs(self) -> list:
+        """
+        작업 상태 목록을 최근 순으로 반환합니다. (복사본)
+        """
+        with self.lock:
+            return sorted((dict(job) for job in self.jobs.values()), key=lambda job: job["submitted_at"], reverse=True)
@@ -0,0 +1,45 @@
+import hashlib
+from collections import defaultdict
+from datetime import time
+
+# ----- 설정별 발송 일정 기본값 -----
+DEFAULT_SCHEDULE_CRON = "0 17 * * *"   # 매일 17:00 (분 시 일 월 요일)
+DEFAULT_CUTOFF = "17:30"               # 직전 영업일의 이 시각 이후 발행된 보도자료부터 수집
+DISPATCH_JITTER_SECONDS = 300          # 같은 시각에 몰린 설정들을 이 시간 안에 나눠서 발송
+MAX_CONCURRENT_DISPATCH = 4            # 동시에 발송하는 설정 수 상한
+
+
+def get_schedule(setting):
+    """
+    설정의 발송 일정을 반환합니다. 반환값: (cron 문자열, 영업일만 발송 여부, 수집 기준 시각 "HH:MM")
+    """
+    return (
+        setting.get("schedule_cron") or DEFAULT_SCHEDULE_CRON,
+        bool(setting.get("business_days_only", False)),
+        setting.get("cutoff") or DEFAULT_CUTOFF,
+    )
+
+
+def parse_cutoff(cutoff: str) -> time:
+    hour, minute = cutoff.split(":")
+    return time(int(hour), int(minute))
+
+
+def group_by_slot(settings):
+    """
+    같은 cron 일정을 쓰는 설정끼리 묶습니다. 반환값: {cron: [설정, ...]}
+    """
+    slots = defaultdict(list)
+    for setting in settings:
+        slots[get_schedule(setting)[0]].append(setting)
+    return dict(slots)
+
+
+def dispatch_offset(setting_name: str, jitter_seconds: float = DISPATCH_JITTER_SECONDS) -> float:
+    """
+    설정 이름으로 정해지는 발송 지연 시간(초). 재시작해도 같은 설정은 같은 시점에 발송됩니다.
+    """
+    if jitter_seconds <= 0:
+        return 0.0
+    digest = int.from_bytes(hashlib.md5(setting_name.encode("utf-8")).digest()[:4], "big")
+    return (digest / 0xFFFFFFFF) * jitter_seconds
@@ -0,0 +1,77 @@
+import copy
+import threading
+from concurrent.futures import Future
+
+# ----- 같은 요청 합치기 (single-flight) -----
+# 여러 Streamlit 세션과 백그라운드 작업이 같은 요청을 동시에 보내면, 먼저 온 요청 하나만 실제로 보내고
+# 나머지는 그 결과(또는 예외)를 나눠 받습니다. 끝난 요청의 결과는 보관하지 않습니다. (캐시가 아님)
+
+_groups = {}
+_groups_lock = threading.Lock()
+
+
+class SingleFlight:
+    """
+    키가 같은 요청이 동시에 들어오면 한 번만 실행합니다.
+    calls: 실제로 실행한 수, shared: 다른 요청의 결과를 나눠 받아 아낀 수, errors: 실패한 실행 수
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.stats = {"calls": 0, "shared": 0, "errors": 0}
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        func(*args, **kwargs) 를 실행해 결과를 반환합니다.
+        같은 key 가 실행 중이면 기다렸다가 그 결과의 복사본을 반환합니다. (받는 쪽이 고쳐도 서로 영향 없음)
+        """
+        with self.lock:
+            future = self.in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self.in_flight[key] = Future()
+                self.stats["calls"] += 1
+            else:
+                self.stats["shared"] += 1
+
+        if not leader:
+            return copy.deepcopy(future.result())
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            with self.lock:
+                self.stats["errors"] += 1
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {**self.stats, "in_flight": len(self.in_flight)}
+
+
+def get_group(name: str) -> SingleFlight:
+    """
+    이름별로 프로세스 전체에서 하나의 SingleFlight 를 반환합니다.
+    """
+    with _groups_lock:
+        group = _groups.get(name)
+        if group is None:
+            group = _groups[name] = SingleFlight(name)
+        return group
+
+
+def singleflight_stats() -> dict:
+    """
+    그룹별 통계를 반환합니다. 예: {"dooray": {"calls": 10, "shared": 4, "errors": 0, "in_flight": 1}}
+    """
+    with _groups_lock:
+        groups = list(_groups.values())
+    return {group.name: group.snapshot() for group in groups}
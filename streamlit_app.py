@@ -2,6 +2,14 @@ import streamlit as st
 import os
 import json
 from dooray_api_client import DoorayAPIClient
+from digest_pagination import DEFAULT_MAX_PAGE_BYTES, DEFAULT_MAX_PAGE_ITEMS
+from feed_registry import load_rss_url_dict
+from keyword_router import parse_keywords
+from enclosure_mirror import DEFAULT_MAX_FILE_BYTES
+from digest_templates import list_templates, DEFAULT_TEMPLATE
+from delivery_ledger import DEFAULT_INTRADAY_INTERVAL_MINUTES
+from setting_schedule import DEFAULT_SCHEDULE_CRON, DEFAULT_CUTOFF, parse_cutoff
+from apscheduler.triggers.cron import CronTrigger
 
 st.title("Dooray! Wiki News 설정 페이지")
 
@@ -136,10 +144,52 @@ gpt_prompt = ""
 if use_gpt:
     gpt_prompt = st.text_area(" 본문을 요약하기 위한 GPT 프롬프트를 입력하세요", key="gpt_prompt")
 
+# 키워드/부서 필터 (비워두면 모든 보도자료를 받음)
+with st.expander("키워드/부서 필터"):
+    include_keywords = st.text_input("포함 키워드 (쉼표로 구분, 하나라도 제목/요약에 있으면 포함)", key="include_keywords")
+    exclude_keywords = st.text_input("제외 키워드 (쉼표로 구분, 하나라도 있으면 제외)", key="exclude_keywords")
+    departments = st.multiselect("받을 부서 (비워두면 전체)", list(load_rss_url_dict()), key="departments")
+
+# 첨부파일 미러링 (보도자료의 PDF/HWP/이미지를 위키에 올리고 링크)
+with st.expander("첨부파일 설정"):
+    mirror_enclosures = st.checkbox("보도자료 첨부파일을 위키에 함께 올리기", key="mirror_enclosures")
+    enclosure_max_mb = st.number_input("첨부파일 하나의 최대 크기 (MB)", min_value=1, value=DEFAULT_MAX_FILE_BYTES // (1024 * 1024), step=1, key="enclosure_max_mb")
+
+# 발송 일정 (같은 시각에 몰린 설정은 스케줄러가 몇 분에 걸쳐 나눠 발송)
+with st.expander("발송 일정 설정"):
+    schedule_cron = st.text_input("발송 일정 (cron: 분 시 일 월 요일)", value=DEFAULT_SCHEDULE_CRON, key="schedule_cron")
+    business_days_only = st.checkbox("영업일(주말·공휴일 제외)에만 발송", key="business_days_only")
+    cutoff = st.time_input("수집 기준 시각 (직전 영업일 이 시각 이후 보도자료)", value=parse_cutoff(DEFAULT_CUTOFF), key="cutoff")
+
+# 하루 중 증분 발송 (오늘 페이지가 생긴 뒤 새로 나온 보도자료만 댓글 또는 본문 덧붙이기로 발송)
+INTRADAY_LABELS = {"off": "사용 안 함", "comment": "오늘 페이지에 댓글로", "append": "오늘 페이지 본문 끝에 덧붙이기"}
+with st.expander("하루 중 새 보도자료 발송"):
+    intraday_mode = st.selectbox("새 보도자료 발송 방식", list(INTRADAY_LABELS), format_func=INTRADAY_LABELS.get, key="intraday_mode")
+    intraday_interval_minutes = st.number_input("확인 주기 (분)", min_value=5, value=DEFAULT_INTRADAY_INTERVAL_MINUTES, step=5, key="intraday_interval_minutes")
+
+# 주간/월간 요약 (발송한 다이제스트 아카이브로 만든 부서별 건수와 주요 보도자료)
+post_rollups = st.checkbox("주간/월간 요약 페이지도 발송 (매주 월요일, 매월 1일 오전 8시)", key="post_rollups")
+
+# 다이제스트 모양 (templates 폴더의 템플릿 중 선택)
+with st.expander("다이제스트 모양 설정"):
+    template_names = list_templates()
+    template = st.selectbox("템플릿", template_names, index=template_names.index(DEFAULT_TEMPLATE) if DEFAULT_TEMPLATE in template_names else 0, key="template")
+    department_order = st.multiselect("먼저 보여줄 부서 (선택한 순서대로, 나머지는 그 뒤)", list(load_rss_url_dict()), key="department_order")
+
+# 큰 다이제스트 분할 기준 (넘으면 목차 페이지 + 하위 페이지로 나눠 발송)
+with st.expander("페이지 분할 설정"):
+    max_page_bytes = st.number_input("페이지당 최대 크기 (바이트)", min_value=10_000, value=DEFAULT_MAX_PAGE_BYTES, step=10_000, key="max_page_bytes")
+    max_page_items = st.number_input("페이지당 최대 항목 수", min_value=5, value=DEFAULT_MAX_PAGE_ITEMS, step=5, key="max_page_items")
+
 if naver_news_search_term:
     setting_name = st.text_input("세팅 명을 입력하세요", key="setting_name")
     
     if st.button("저장"):
+        try:
+            CronTrigger.from_crontab(schedule_cron, timezone="Asia/Seoul")
+        except ValueError as e:
+            st.error(f"발송 일정 형식이 올바르지 않습니다: {str(e)}")
+            st.stop()
         try:
             # 저장할 데이터 구성 (선택한 사용자 이름과 GPT 프롬프트 포함)
             selected_data = {
@@ -148,8 +198,23 @@ if naver_news_search_term:
                 "page_id": selected_page_id,
                 "page_title": selected_page_title,
                 "naver_news_search_term": naver_news_search_term,
+                "include_keywords": parse_keywords(include_keywords),
+                "exclude_keywords": parse_keywords(exclude_keywords),
+                "departments": departments,
                 "use_gpt": use_gpt,
-                "gpt_prompt": gpt_prompt
+                "gpt_prompt": gpt_prompt,
+                "mirror_enclosures": mirror_enclosures,
+                "enclosure_max_bytes": int(enclosure_max_mb) * 1024 * 1024,
+                "post_rollups": post_rollups,
+                "intraday_mode": intraday_mode,
+                "intraday_interval_minutes": int(intraday_interval_minutes),
+                "template": template,
+                "department_order": department_order,
+                "max_page_bytes": int(max_page_bytes),
+                "max_page_items": int(max_page_items),
+                "schedule_cron": schedule_cron,
+                "business_days_only": business_days_only,
+                "cutoff": cutoff.strftime("%H:%M")
             }
             saved_path = save_setting(selected_data, setting_name, folder="task_list")
             st.success(f"세팅이 저장되었습니다. 파일 경로: {saved_path}")